@@ -83,6 +83,7 @@ setup(
                 'superplot_gui = superplot.super_gui:main',
                 'superplot_summary = superplot.summary:main',
                 'superplot_cli = superplot.super_command:main',
+                'superplot_batch = superplot.super_batch:main',
                 'superplot_create_home_dir = superplot.create_home_dir:main'
             ]
         }
@@ -4,83 +4,849 @@ This module contains code for:
 - Opening and processing a \\*.txt data file.
 - Opening and processing an \\*.info information file.
 - Using the \\*.info file to label the data.
+- Caching the parsed \\*.txt data file in a binary sidecar file.
+- Reading a \\*.txt data file in blocks of rows.
+- Reading and concatenating several \\*.txt data files in parallel.
+- Following a growing \\*.txt data file, reading only appended rows.
 """
 
+import io
+import os
+import glob
+import time
 import warnings
+import multiprocessing
+import numpy as np
 import pandas as pd
 
+from superplot.statslib import cache as stats_cache
 
-def load(info_file, data_file):
+
+CACHE_SUFFIX = ".cache.npy"
+"""
+Suffix of binary sidecar cache written next to a \\*.txt file.
+"""
+
+CACHE_VERSION = 2
+"""
+Version of binary cache, which is increased when parsing changes such that
+existing caches are stale.
+"""
+
+FOLLOW_HEAD_SIZE = 4096
+"""
+Number of leading bytes of a followed \\*.txt file compared between reads, to
+detect the file being rewritten.
+"""
+
+
+def load(info_file, data_file, cache=True, mmap=False, columns=None,
+         file_weights=None, processes=None):
     """
     Read data from \\*.info file and \\*.txt file.
 
-    :param data_file: Name of \\*.txt file
-    :type data_file: string
+    The \\*.txt file may be a list of \\*.txt files or a glob pattern, e.g.
+    `"chains/run_*.txt"`, in which case the files are read in a pool of
+    processes and concatenated into a single chain in memory. The posterior
+    weights of each file may be re-weighted with `file_weights`.
+
+    If `mmap` is True, the data is a read-only :class:`numpy.memmap` of the
+    binary cache, rather than an array in memory. Columns are contiguous, so
+    that only columns that are accessed, e.g. `data[2]`, are read from disk.
+
+    If `columns` is specified, the data is a dictionary of only those
+    columns, indexed by column number, e.g. `data[2]`. If there is no
+    up-to-date binary cache, all columns are parsed once to write the cache.
+    Without a cache, only those columns are parsed from the \\*.txt file.
+
+    :param data_file: Name of \\*.txt file, list of names or glob pattern
+    :type data_file: string or list
     :param info_file: Name of \\*.info file
     :type info_file: string
+    :param cache: Whether to read/write a binary cache of the \\*.txt file
+    :type cache: bool
+    :param mmap: Whether to memory-map the binary cache of the \\*.txt file.
+        Ignored if there are several \\*.txt files.
+    :type mmap: bool
+    :param columns: Column numbers or labels of columns to load, or None for
+        all columns
+    :type columns: list
+    :param file_weights: If specified, the posterior weights of each \\*.txt
+        file are normalized such that they sum to the corresponding file weight,
+        e.g. `[1.] * n_files` for equal weight per file
+    :type file_weights: list
+    :param processes: Number of processes for reading several \\*.txt files,
+        or None for the number of CPUs
+    :type processes: integer
 
     :returns: Dictionary with chain's labels and array of data
-    :rtype: dict (labels), array (data)
+    :rtype: dict (labels), array or dict (data)
     """
     if not data_file:
         raise RuntimeWarning("Must specify a *.txt data file")
 
-    data = _read_data_file(data_file)
+    if mmap and not cache:
+        raise ValueError("Memory-mapping requires a binary cache")
+
+    data_files = data_file_names(data_file)
+
+    if file_weights is not None and len(file_weights) != len(data_files):
+        raise ValueError("Need one weight per *.txt file")
+
     labels = _read_info_file(info_file)
+
+    if columns is not None:
+        columns = _column_indices(columns, labels)
+        if file_weights is not None and 0 not in columns:
+            raise ValueError("Re-weighting requires posterior weight column")
+
+    # Fingerprint before reading, in case files are modified whilst reading
+    fingerprints = [_fingerprint(name) for name in data_files]
+
+    if len(data_files) == 1 and file_weights is None:
+        data = _read_data_file(data_files[0], cache=cache, mmap=mmap, columns=columns)
+    else:
+        data = _read_data_files(data_files, cache, columns, file_weights, processes)
+
     _label_chain(data, labels)
+    _register_chain(data, data_files, fingerprints, file_weights)
 
     return labels, data
 
 
-def _read_data_file(file_name, fill=0.):
+def _register_chain(data, data_files, fingerprints, file_weights=None):
     """
-    Read \\*.txt file into an array.
+    Register data columns with the cache of statistics, such that they are
+    identified by the fingerprints of the \\*.txt files rather than hashed.
+
+    If a \\*.txt file was modified whilst it was read, e.g. because a scan is
+    still running, the data may not match either fingerprint, so the columns
+    aren't registered, and are hashed instead.
+
+    :param data: Data chain
+    :type data: numpy.array or dict
+    :param data_files: Names of \\*.txt files
+    :type data_files: list
+    :param fingerprints: Fingerprints of \\*.txt files before they were read
+    :type fingerprints: list
+    :param file_weights: Weights of \\*.txt files
+    :type file_weights: list
+    """
+    for data_file, fingerprint in zip(data_files, fingerprints):
+        if not np.array_equal(_fingerprint(data_file), fingerprint):
+            warnings.warn("{} was modified whilst it was read".format(data_file))
+            return
+
+    files = tuple((os.path.abspath(data_file),) + tuple(fingerprint)
+                  for data_file, fingerprint in zip(data_files, fingerprints))
+    if file_weights is not None:
+        file_weights = tuple(file_weights)
+
+    if isinstance(data, dict):
+        indices = data.keys()
+    else:
+        indices = range(len(data))
+
+    for index in indices:
+        stats_cache.register(data[index], (files, file_weights, index))
+
+
+def data_file_names(data_file):
+    """
+    Expand a glob pattern of \\*.txt files.
+
+    :param data_file: Name of \\*.txt file, list of names or glob pattern
+    :type data_file: string or list
+
+    :returns: Names of \\*.txt files
+    :rtype: list
+    """
+    if not isinstance(data_file, basestring):
+        return list(data_file)
+
+    if not any(character in data_file for character in "*?["):
+        return [data_file]
+
+    data_files = sorted(glob.glob(data_file))
+    if not data_files:
+        raise IOError("No *.txt files match {}".format(data_file))
+
+    return data_files
+
+
+def _read_data_file_args(args):
+    """
+    Unpack arguments for :func:`_read_data_file`, for use with
+    :meth:`multiprocessing.Pool.map`.
+    """
+    return _read_data_file(*args)
+
+
+def _read_data_files(data_files, cache=True, columns=None, file_weights=None,
+                     processes=None):
+    """
+    Read several \\*.txt files in a pool of processes and concatenate them.
+
+    :param data_files: Names of \\*.txt files
+    :type data_files: list
+    :param cache: Whether to read/write binary caches of the \\*.txt files
+    :type cache: bool
+    :param columns: Column numbers of columns to read, or None for all columns
+    :type columns: list
+    :param file_weights: Sum of posterior weights for each \\*.txt file, or
+        None to leave posterior weights unaltered
+    :type file_weights: list
+    :param processes: Number of processes, or None for the number of CPUs
+    :type processes: integer
+
+    :returns: Data as an array, with first index as column number, or, if
+        `columns` is specified, dictionary of columns indexed by column number
+    :rtype: numpy.array or dict
+    """
+    # Read cached files from a memory-map in this process, and parse the
+    # remaining files in a pool of processes
+    chains = [_read_cache(data_file, mmap=True) if cache else None
+              for data_file in data_files]
+    chains = [_project(chain, columns, copy=False) if chain is not None else None
+              for chain in chains]
+    uncached = [data_file for data_file, chain in zip(data_files, chains)
+                if chain is None]
+
+    args = [(data_file, 0., cache, False, columns) for data_file in uncached]
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(uncached))
+
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+        try:
+            parsed = pool.map(_read_data_file_args, args)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        parsed = map(_read_data_file_args, args)
+
+    parsed = iter(parsed)
+    chains = [chain if chain is not None else next(parsed) for chain in chains]
+
+    if columns is None:
+        n_cols = set(len(chain) for chain in chains)
+        if len(n_cols) != 1:
+            raise ValueError("*.txt files have differing numbers of columns")
+        indices = range(n_cols.pop())
+    else:
+        indices = columns
+
+    # Copy the chains into a single array, such that columns are contiguous
+    n_rows = [len(chain[indices[0]]) for chain in chains]
+    data_array = np.empty((len(indices), sum(n_rows)))
+    stop = 0
+
+    for number, chain in enumerate(chains):
+        start, stop = stop, stop + n_rows[number]
+
+        for position, index in enumerate(indices):
+            data_array[position, start:stop] = chain[index]
+
+        if file_weights is not None:
+            posterior = data_array[indices.index(0), start:stop]
+            total = posterior.sum()
+            if not total > 0.:
+                raise ValueError("Cannot re-weight {}: its posterior weights sum to {}".format(
+                    data_files[number], total))
+            posterior *= file_weights[number] / total
+
+    if columns is None:
+        return data_array
+
+    return dict(zip(columns, data_array))
+
+
+def iter_chunks(data_file, chunk_size=100000, columns=None, fill=0., cache=True):
+    """
+    Read \\*.txt file in blocks of rows, without ever holding the whole
+    chain in memory.
+
+    Each block is an array with first index as column number, or, if `columns`
+    is specified, as position in `columns`, so that e.g.::
+
+        for posterior, chi_sq in iter_chunks(data_file, columns=[0, 1]):
+            ...
+
+    If there is an up-to-date binary cache of the \\*.txt file, blocks are
+    copied from a memory-map of the cache. A cache is never written.
+
+    :param data_file: Name of \\*.txt file
+    :type data_file: string
+    :param chunk_size: Number of rows per block
+    :type chunk_size: integer
+    :param columns: Column numbers of columns to read, in desired order, or
+        None for all columns
+    :type columns: list
+    :param fill: Fill value for problematic data entries
+    :type fill: float
+    :param cache: Whether to read a binary cache of the \\*.txt file
+    :type cache: bool
+
+    :returns: Generator of blocks of data
+    :rtype: generator
+    """
+    if cache:
+        data_array = _read_cache(data_file, mmap=True, fill=fill)
+        if data_array is not None:
+            if columns is not None:
+                data_array = [data_array[index] for index in columns]
+            n_rows = len(data_array[0])
+            for start in range(0, n_rows, chunk_size):
+                stop = start + chunk_size
+                yield np.array([column[start:stop] for column in data_array])
+            return
+
+    read_options = dict(header=None,
+                        sep=r"\s+",
+                        engine="c",
+                        usecols=columns,
+                        chunksize=chunk_size)
+    n_rows = 0
+
+    try:
+        for data_frame in pd.read_csv(data_file,
+                                      dtype="float64",
+                                      float_precision="round_trip",
+                                      keep_default_na=False,
+                                      na_values=NAN_ENTRIES,
+                                      **read_options):
+            block = _frame_to_array(data_frame, columns)
+            n_rows += block.shape[1]
+            yield block
+    except ValueError:
+        # Problematic data entries - re-read remaining blocks as strings
+        for data_frame in pd.read_csv(data_file,
+                                      dtype=str,
+                                      na_filter=False,
+                                      skiprows=n_rows,
+                                      **read_options):
+            data_frame.index += n_rows
+            yield _frame_to_array(_coerce_frame(data_frame, fill), columns)
+
+
+class ChainFollower(object):
+    """
+    Follow a \\*.txt file that is growing, e.g. whilst a scan is running, by
+    parsing only the rows appended since it was last read.
+
+    Statistics from :mod:`superplot.statslib.streaming` may be updated in
+    place with the appended rows, e.g.::
+
+        follower = ChainFollower(data_file, columns=[2, 0])
+        pdf = streaming.PosteriorPDF1D(nbins, bin_limits)
+
+        while True:
+            block = follower.read()
+            if block is not None:
+                pdf.update(*block)
+
+    :param data_file: Name of \\*.txt file
+    :type data_file: string
+    :param columns: Column numbers of columns to read, in desired order, or
+        None for all columns
+    :type columns: list
+    :param fill: Fill value for problematic data entries
+    :type fill: float
+    """
+    def __init__(self, data_file, columns=None, fill=0.):
+        self.data_file = data_file
+        self.columns = columns
+        self.fill = fill
+
+        # Byte offset of the end of the last row that was read
+        self.offset = 0
+
+        # Inode and leading bytes of the file that was read, to detect the
+        # file being rewritten
+        self._inode = None
+        self._head = b""
+
+    def _rewritten(self, file_, stat):
+        """
+        :param file_: Open \\*.txt file
+        :type file_: file
+        :param stat: Status of \\*.txt file
+        :type stat: os.stat_result
+
+        :returns: Whether the file was replaced or its leading bytes changed
+            since it was last read
+        :rtype: bool
+        """
+        if self._inode is not None and stat.st_ino != self._inode:
+            return True
+        file_.seek(0)
+        return file_.read(len(self._head)) != self._head
+
+    def read(self):
+        """
+        Parse rows appended since the last read. An incomplete last row, i.e.
+        one without a newline that may still be being written, is left for
+        the next read.
+
+        .. warning::
+            If the \\*.txt file shrinks or is rewritten, e.g. because a scan
+            was restarted, it is read again from the start. Any statistics
+            should be reset. A rewritten file is detected by its inode and its
+            first :data:`FOLLOW_HEAD_SIZE` bytes.
+
+        :returns: Appended rows as an array with first index as column number,
+            or, if `columns` is specified, as position in `columns`, or None if
+            no rows were appended
+        :rtype: numpy.array
+        """
+        with open(self.data_file, "rb") as file_:
+            stat = os.fstat(file_.fileno())
+            size = stat.st_size
+
+            if size < self.offset:
+                warnings.warn("{} shrank - reading from start".format(self.data_file))
+                self.offset = 0
+            elif self.offset and self._rewritten(file_, stat):
+                warnings.warn("{} was rewritten - reading from start".format(self.data_file))
+                self.offset = 0
+
+            if not self.offset:
+                self._head = b""
+            self._inode = stat.st_ino
+
+            file_.seek(self.offset)
+            appended = file_.read(size - self.offset)
+
+        # Keep only complete rows
+        appended = appended[:appended.rfind(b"\n") + 1]
+        self.offset += len(appended)
+
+        if len(self._head) < FOLLOW_HEAD_SIZE:
+            self._head = (self._head + appended)[:FOLLOW_HEAD_SIZE]
+
+        if not appended.strip():
+            return None
+
+        return _parse_data_file(io.BytesIO(appended), self.fill, self.columns)
+
+
+def follow(data_file, interval=5., columns=None, fill=0.):
+    """
+    Follow a \\*.txt file that is growing, yielding blocks of rows as they are
+    appended. See :class:`ChainFollower`. The generator never finishes.
+
+    :param data_file: Name of \\*.txt file
+    :type data_file: string
+    :param interval: Seconds to wait before checking for appended rows again
+    :type interval: float
+    :param columns: Column numbers of columns to read, in desired order, or
+        None for all columns
+    :type columns: list
+    :param fill: Fill value for problematic data entries
+    :type fill: float
+
+    :returns: Generator of blocks of appended rows
+    :rtype: generator
+    """
+    follower = ChainFollower(data_file, columns, fill)
+
+    while True:
+        block = follower.read()
+        if block is not None:
+            yield block
+        else:
+            time.sleep(interval)
+
+
+def _column_indices(columns, labels):
+    """
+    Find column numbers of columns specified by number or by label.
+
+    :param columns: Column numbers or labels
+    :type columns: list
+    :param labels: Labels of columns in \\*.txt file
+    :type labels: dict
+
+    :returns: Sorted, unique column numbers
+    :rtype: list
+    """
+    indices = set()
+
+    for column in columns:
+        if column is None:
+            continue
+        if isinstance(column, basestring):
+            matches = [index for index, label in labels.iteritems()
+                       if label.strip() == column.strip()]
+            if not matches:
+                raise KeyError("No column labelled {}".format(column))
+            indices.update(matches)
+        else:
+            indices.add(int(column))
+
+    return sorted(indices)
+
+
+def _fingerprint(file_name):
+    """
+    Cheap fingerprint of a file, used to check whether a cache is stale.
+
+    :param file_name: Name of file
+    :type file_name: string
+
+    :returns: Size and modification time of file
+    :rtype: numpy.array
+    """
+    stat = os.stat(file_name)
+    return np.array([stat.st_size, stat.st_mtime], dtype='float64')
+
+
+def _cache_key(file_name, fill=0.):
+    """
+    Key of binary cache of \\*.txt file, which changes if the \\*.txt file
+    or the options with which it is parsed change.
 
     :param file_name: Name of \\*.txt file
     :type file_name: string
     :param fill: Fill value for problematic data entries
     :type fill: float
 
-    :returns: Data as an array, with first index as column number
+    :returns: Fingerprint of file, fill value and version of cache
     :rtype: numpy.array
     """
+    return np.append(_fingerprint(file_name), [fill, CACHE_VERSION])
 
-    # Make converters that don't raise exceptions on problematic data entries
 
-    def safe_float(entry):
-        """
-        :param entry: String from \\*.txt file
-        :type entry: str
+def _replace(temp_name, name):
+    """
+    Rename a temporary file, replacing any existing file. On Windows, renaming
+    fails if the target exists, so it is removed first.
 
-        :returns: Float of argument
-        :rtype: float
-        """
+    :param temp_name: Name of temporary file
+    :type temp_name: string
+    :param name: Name of file
+    :type name: string
+    """
+    try:
+        os.rename(temp_name, name)
+    except OSError:
         try:
-            return float(entry)
-        except ValueError:
-            warnings.warn("{} filled with {}".format(entry, fill))
-            return fill
+            os.remove(name)
+        except OSError:
+            pass
+        os.rename(temp_name, name)
+
+
+def _cache_names(file_name):
+    """
+    :param file_name: Name of \\*.txt file
+    :type file_name: string
+
+    :returns: Names of binary cache of data and of its fingerprint
+    :rtype: tuple(string, string)
+    """
+    data_cache = file_name + CACHE_SUFFIX
+    key_cache = file_name + ".key" + CACHE_SUFFIX
+    return data_cache, key_cache
+
+
+def _read_cache(file_name, mmap=False, fill=0.):
+    """
+    Read binary cache of \\*.txt file, if it exists and is up-to-date.
+
+    :param file_name: Name of \\*.txt file
+    :type file_name: string
+    :param mmap: Whether to memory-map the cache read-only
+    :type mmap: bool
+    :param fill: Fill value for problematic data entries
+    :type fill: float
+
+    :returns: Data as an array, with first index as column number, or None
+    :rtype: numpy.array
+    """
+    data_cache, key_cache = _cache_names(file_name)
+
+    try:
+        key = np.load(key_cache)
+    except (IOError, OSError, ValueError):
+        return None
+
+    # NB the fill value may be NaN
+    expected = _cache_key(file_name, fill)
+    if key.shape != expected.shape or not np.all((key == expected) | (np.isnan(key) & np.isnan(expected))):
+        return None
+
+    try:
+        data_array = np.load(data_cache, mmap_mode="r" if mmap else None)
+    except (IOError, OSError, ValueError):
+        return None
+
+    # Columns must be contiguous, so that memory-mapped columns are cheap
+    if not data_array.flags.c_contiguous:
+        return None
+
+    return data_array
+
+
+def _write_cache(file_name, data_array, key):
+    """
+    Write binary cache of \\*.txt file. Failure to write the cache, e.g.
+    because the directory is read-only, is not fatal.
+
+    The data is written before the fingerprint, and each is written to a
+    temporary file that is then renamed, so that an interrupted write never
+    leaves a cache that appears up-to-date.
+
+    :param file_name: Name of \\*.txt file
+    :type file_name: string
+    :param data_array: Data as an array, with first index as column number
+    :type data_array: numpy.array
+    :param key: Key of \\*.txt file when it was parsed
+    :type key: numpy.array
+    """
+    data_cache, key_cache = _cache_names(file_name)
+
+    try:
+        for name, array in [(data_cache, data_array), (key_cache, key)]:
+            temp_name = "{}.{}.tmp".format(name, os.getpid())
+            with open(temp_name, "wb") as temp_file:
+                np.save(temp_file, array)
+            _replace(temp_name, name)
+    except (IOError, OSError) as error:
+        warnings.warn("Could not write cache of {}: {}".format(file_name, error))
+
+
+def _read_data_file(file_name, fill=0., cache=True, mmap=False, columns=None):
+    """
+    Read \\*.txt file into an array.
+
+    If `cache` is True, the array is read from a binary cache written next to
+    the \\*.txt file, if one exists and the \\*.txt file has not since been
+    modified. Otherwise, all columns of the \\*.txt file are parsed and the
+    cache is written, even if only some columns are requested.
+
+    :param file_name: Name of \\*.txt file
+    :type file_name: string
+    :param fill: Fill value for problematic data entries
+    :type fill: float
+    :param cache: Whether to read/write a binary cache of the \\*.txt file
+    :type cache: bool
+    :param mmap: Whether to memory-map the binary cache read-only
+    :type mmap: bool
+    :param columns: Column numbers of columns to read, or None for all columns
+    :type columns: list
+
+    :returns: Data as an array, with first index as column number, or, if
+        `columns` is specified, dictionary of columns indexed by column number
+    :rtype: numpy.array or dict
+    """
+    if cache:
+        data_array = _read_cache(file_name, mmap, fill)
+        if data_array is not None:
+            return _project(data_array, columns, copy=not mmap)
+
+        # Fingerprint before parsing, in case file is modified whilst parsing
+        key = _cache_key(file_name, fill)
+
+    elif columns is not None:
+        # Parse only the requested columns
+        data_array = _parse_data_file(file_name, fill, columns)
+        return dict(zip(columns, data_array))
 
-    with open(file_name) as file_:
-        n_cols = len(file_.readline().split())
+    data_array = _parse_data_file(file_name, fill)
 
-    converters = dict.fromkeys(range(n_cols), safe_float)
+    if cache:
+        _write_cache(file_name, data_array, key)
+
+    if mmap:
+        # Map the cache that was just written in place of the parsed array
+        mapped_array = _read_cache(file_name, mmap, fill)
+        if mapped_array is not None:
+            return _project(mapped_array, columns, copy=False)
+        warnings.warn("Could not memory-map cache of {}".format(file_name))
+
+    return _project(data_array, columns)
+
+
+def _project(data_array, columns, copy=True):
+    """
+    Select columns from data.
+
+    :param data_array: Data as an array, with first index as column number
+    :type data_array: numpy.array
+    :param columns: Column numbers of columns to select, or None for all columns
+    :type columns: list
+    :param copy: Whether to copy the selected columns, such that the remaining
+        columns can be freed
+    :type copy: bool
+
+    :returns: Data, or dictionary of columns indexed by column number
+    :rtype: numpy.array or dict
+    """
+    if columns is None:
+        return data_array
+
+    n_cols = len(data_array)
+    missing = [index for index in columns if not 0 <= index < n_cols]
+    if missing:
+        raise IndexError("Columns {} not in data with {} columns".format(
+            missing, n_cols))
+
+    if copy:
+        return {index: np.array(data_array[index]) for index in columns}
+    return {index: data_array[index] for index in columns}
+
+
+NAN_ENTRIES = ["nan", "NaN", "NAN", "+nan", "-nan", "+NaN", "-NaN"]
+"""
+Entries in a \\*.txt file that are parsed as a NaN rather than as problematic.
+"""
+
+
+def _parse_data_file(file_name, fill=0., columns=None):
+    """
+    Parse \\*.txt file, or file object with its contents, into an array.
+
+    The file is parsed by pandas' native C float parser. Only if that fails,
+    i.e. if there are problematic data entries, is the file re-parsed as
+    strings and the problematic entries replaced by `fill`.
+
+    :param file_name: Name of \\*.txt file
+    :type file_name: string
+    :param fill: Fill value for problematic data entries
+    :type fill: float
+    :param columns: Column numbers of columns to parse, or None for all columns
+    :type columns: list
+
+    :returns: Data as an array, with first index as column number, or, if
+        `columns` is specified, as position in `columns`
+    :rtype: numpy.array
+    """
+    try:
+        # Read data into a pandas data-frame
+        data_frame = pd.read_csv(file_name,
+                                 header=None,
+                                 sep=r"\s+",
+                                 engine="c",
+                                 usecols=columns,
+                                 dtype="float64",
+                                 float_precision="round_trip",
+                                 keep_default_na=False,
+                                 na_values=NAN_ENTRIES)
+    except ValueError:
+        data_frame = _coerce_data_file(file_name, fill, columns)
+
+    return _frame_to_array(data_frame, columns)
+
+
+def _frame_to_array(data_frame, columns=None):
+    """
+    :param data_frame: Data as a data-frame of floats
+    :type data_frame: pandas.DataFrame
+    :param columns: Column numbers of columns in data-frame, in desired order,
+        or None for all columns
+    :type columns: list
+
+    :returns: Data as an array, with first index as column number, or, if
+        `columns` is specified, as position in `columns`
+    :rtype: numpy.array
+    """
+    if columns is not None:
+        # Order columns as requested, rather than as in file
+        data_frame = data_frame[columns]
+
+    # Find array from data-frame, transposed such that first index is column
+    # rather than row. Make a single contiguous copy, such that columns are
+    # contiguous in memory.
+    return np.ascontiguousarray(data_frame.values.T, dtype='float64')
+
+
+def _coerce_data_file(file_name, fill=0., columns=None, max_reported=10):
+    """
+    Parse \\*.txt file, or file object with its contents, with problematic
+    data entries into a data-frame.
+
+    Entries are converted to floats column by column. Entries that pandas
+    cannot convert are converted with :func:`float`, and if that fails too,
+    are replaced by `fill`.
+
+    :param file_name: Name of \\*.txt file
+    :type file_name: string
+    :param fill: Fill value for problematic data entries
+    :type fill: float
+    :param columns: Column numbers of columns to parse, or None for all columns
+    :type columns: list
+    :param max_reported: Maximum number of problematic entries listed in warning
+    :type max_reported: integer
+
+    :returns: Data as a data-frame of floats
+    :rtype: pandas.DataFrame
+    """
+    # Re-read file object from the start
+    if hasattr(file_name, "seek"):
+        file_name.seek(0)
 
-    # Read data into a pandas data-frame
     data_frame = pd.read_csv(file_name,
                              header=None,
                              sep=r"\s+",
                              engine="c",
-                             converters=converters,
+                             usecols=columns,
+                             dtype=str,
                              na_filter=False)
 
-    # Transpose data-frame, such that first index is column rather than row
-    data_frame = data_frame.transpose()
+    return _coerce_frame(data_frame, fill, max_reported)
 
-    # Find array from data-frame
-    data_array = data_frame.values.astype('float64')
 
-    return data_array
+def _coerce_frame(data_frame, fill=0., max_reported=10):
+    """
+    Convert a data-frame of strings to floats, replacing problematic data
+    entries by `fill`. A single warning lists the problematic entries.
+
+    :param data_frame: Data as a data-frame of strings
+    :type data_frame: pandas.DataFrame
+    :param fill: Fill value for problematic data entries
+    :type fill: float
+    :param max_reported: Maximum number of problematic entries listed in warning
+    :type max_reported: integer
+
+    :returns: Data as a data-frame of floats
+    :rtype: pandas.DataFrame
+    """
+    problems = []
+
+    for column in data_frame.columns:
+
+        entries = data_frame[column]
+        floats = pd.to_numeric(entries, errors="coerce").values
+
+        # pandas' conversion isn't exact, so convert the entries it could
+        # convert again with float, as when the file is parsed without problems
+        converted = ~np.isnan(floats)
+        floats[converted] = entries.values[converted].astype("float64")
+
+        # Only entries that pandas could not convert are converted one by one,
+        # i.e. NaNs, infinities and problematic entries.
+        for row in np.flatnonzero(~converted):
+            try:
+                floats[row] = float(entries.iat[row])
+            except ValueError:
+                floats[row] = fill
+                problems.append((entries.index[row], column, entries.iat[row]))
+
+        data_frame[column] = floats
+
+    if problems:
+        listed = ", ".join("{} (row {}, column {})".format(entry, row, column)
+                           for row, column, entry in problems[:max_reported])
+        if len(problems) > max_reported:
+            listed += ", ..."
+        warnings.warn("{} problematic entries filled with {}: {}".format(
+            len(problems), fill, listed))
+
+    return data_frame
 
 
 def _read_info_file(file_name):
@@ -145,13 +911,18 @@ def _label_chain(data, labels):
         This alters labels in place.
 
     :param data: Data chain, to match arguments with
-    :type data: numpy.array
+    :type data: numpy.array or dict
     :param info: Labels for data chain
     :type info: dict
     """
+    # Dictionaries of columns are indexed by column number
+    if isinstance(data, dict):
+        indices = data.keys()
+    else:
+        indices = range(len(data))
 
     # Label all unlabelled columns with integers
-    for index in range(len(data)):
+    for index in indices:
         if not labels.get(index):
             warnings.warn("Labels did not match data. "
                           "Missing labels are integers.")
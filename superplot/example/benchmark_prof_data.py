@@ -0,0 +1,100 @@
+"""
+=========================================
+Benchmark of one-dimensional profile data
+=========================================
+Compare the vectorized :func:`superplot.statslib.one_dim.prof_data` with the
+original implementation, which looped over every point in the chain, on
+synthetic chains of increasing length. Check that the outputs are identical.
+
+    python benchmark_prof_data.py --max_rows=100000000 --max_loop_rows=1000000
+
+The loop takes about a minute per 10^7 rows, so by default it is only timed for
+shorter chains.
+"""
+
+from argparse import ArgumentParser as arg_parser
+from timeit import default_timer as timer
+import numpy as np
+
+import superplot.statslib.one_dim as one_dim
+import superplot.statslib.point as point
+
+
+NBINS = 70
+
+# Time the implementation rather than the cache of statistics
+prof_data = getattr(one_dim.prof_data, "__wrapped__", one_dim.prof_data)
+
+
+def loop_prof_chi_sq(parameter, chi_sq, nbins=NBINS):
+    """
+    Original implementation of profiled chi-squared, with a loop over every
+    point in the chain.
+
+    :param parameter: Data column of parameter of interest
+    :type parameter: numpy.ndarray
+    :param chi_sq: Data column of chi-squared, same length as data
+    :type chi_sq: numpy.ndarray
+    :param nbins: Number of bins for histogram
+    :type nbins: integer
+
+    :returns: Profiled chi-squared, before subtracting its minimum
+    :rtype: numpy.ndarray
+    """
+    bin_edges = np.histogram(parameter, nbins)[1]
+    bin_numbers = np.digitize(parameter, bin_edges)
+    bin_numbers = [point._shift(bin_number, nbins) for bin_number in bin_numbers]
+
+    prof_chi_sq = np.full(nbins, float("inf"))
+
+    for index in range(chi_sq.size):
+        bin_number = bin_numbers[index]
+        if bin_number is not None and chi_sq[index] < prof_chi_sq[bin_number]:
+            prof_chi_sq[bin_number] = chi_sq[index]
+
+    return prof_chi_sq - prof_chi_sq.min()
+
+
+def synthetic_chain(n_rows):
+    """
+    :param n_rows: Number of points in chain
+    :type n_rows: integer
+
+    :returns: Gaussian parameter and chi-squared
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)
+    """
+    parameter = np.random.normal(size=n_rows)
+    chi_sq = parameter**2 + np.random.chisquare(3, size=n_rows)
+    return parameter, chi_sq
+
+
+def main():
+    parser = arg_parser(description='Benchmark one_dim.prof_data')
+    parser.add_argument('--max_rows', type=float, default=1E8)
+    parser.add_argument('--max_loop_rows', type=float, default=1E6)
+    args = parser.parse_args()
+
+    n_rows = 10**5
+    while n_rows <= args.max_rows:
+
+        parameter, chi_sq = synthetic_chain(n_rows)
+
+        start = timer()
+        prof = prof_data(parameter, chi_sq, nbins=NBINS)
+        vectorized = timer() - start
+
+        if n_rows <= args.max_loop_rows:
+            start = timer()
+            loop = loop_prof_chi_sq(parameter, chi_sq)
+            looped = timer() - start
+            identical = np.array_equal(loop, prof.prof_chi_sq)
+            print "{:.0e} rows: loop {:.3f}s, vectorized {:.3f}s, identical {}".format(
+                n_rows, looped, vectorized, identical)
+        else:
+            print "{:.0e} rows: vectorized {:.3f}s".format(n_rows, vectorized)
+
+        n_rows *= 10
+
+
+if __name__ == "__main__":
+    main()
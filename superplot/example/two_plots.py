@@ -53,7 +53,7 @@ def add_data(data, scheme, leg_loc, leg_title):
                                          bin_limits=BIN_LIMITS)
 
     pdf = pdf_data.pdf / pdf_data.pdf.sum()
-    levels = [two_dim.critical_density(pdf, aa) for aa in ALPHA]
+    levels = list(two_dim.critical_densities(pdf, ALPHA))
     pm.plot_contour(pdf, levels, scheme.posterior, BIN_LIMITS)
 
     # Best-fit point
@@ -52,9 +52,11 @@ plot_options = namedtuple("plot_options", (
     "show_posterior_pdf",
     "show_prof_like",
     
-    # Whether to use KDE for PDF, and if so, band-width method
+    # Whether to use KDE for PDF, and if so, band-width method and number of
+    # grid points per dimension for FFT
     "kde_pdf",
-    "bw_method"
+    "bw_method",
+    "kde_gridsize"
 ))
 
 
@@ -1 +1 @@
-__all__ = ["base", "plot_mod", "plots"]
\ No newline at end of file
+__all__ = ["base", "context", "plot_mod", "plots"]
\ No newline at end of file
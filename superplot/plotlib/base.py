@@ -11,7 +11,9 @@ from abc import ABCMeta, abstractmethod
 import numpy as np
 import matplotlib.pyplot as plt
 import warnings
+import weakref
 from collections import namedtuple
+from functools import update_wrapper
 
 # SuperPy modules.
 import plot_mod as pm
@@ -19,6 +21,36 @@ import superplot.statslib.one_dim as one_dim
 import superplot.statslib.two_dim as two_dim
 import superplot.statslib.point as stats
 import superplot.schemes as schemes
+from context import AnalysisContext
+
+
+# Log-scaled columns, keyed by the address and layout of the column, with a
+# weak reference to the data of the column
+_LOG_COLUMNS = dict()
+
+# Options on which the profile likelihood depends
+_PROF_OPTIONS = ("nbins", "bin_limits")
+
+
+class lazy_property(object):
+    """
+    Decorator for a statistic that is computed when it is first accessed,
+    and then stored as an attribute of the plot. A plot computes only the
+    statistics that it draws or summarises.
+
+    :param func: Method computing the statistic
+    :type func: function
+    """
+    def __init__(self, func):
+        self.func = func
+        update_wrapper(self, func)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = self.func(instance)
+        instance.__dict__[self.func.__name__] = value
+        return value
 
 
 class Plot(object):
@@ -27,28 +59,44 @@ class Plot(object):
     creating a plot object, and getting the figure associated
     with it. Does any common preprocessing / init (IE log scaling).
 
+    Statistics are computed when they are first needed. The summary of a
+    figure always lists the same point statistics, in the same order, followed
+    by any statistics specific to the plot type.
+
+    Statistics are shared by plots made with the same analysis context, so
+    that e.g. all plot types of a pair of parameters compute the posterior PDF
+    once. By default, a plot has its own context.
+
     :param data: Data dictionary loaded from chain file by :py:mod:`data_loader`
     :type data: dict
     :param plot_options: :py:data:`plot_options.plot_options` configuration tuple.
     :type plot_options: namedtuple
+    :param context: Analysis context of the data
+    :type context: :py:class:`plotlib.context.AnalysisContext`
     """
 
     __metaclass__ = ABCMeta
 
-    def __init__(self, data, plot_options):
+    def __init__(self, data, plot_options, context=None):
         self.plot_options = plot_options
 
-        # NB we make copies of the data so there's
+        if context is None:
+            context = AnalysisContext(data)
+        elif context.data is not data:
+            raise ValueError("Analysis context is of different data")
+        self.context = context
+
+        # NB we make read-only views of the data so there's
         # no way for a plot to mess things up for other plots
 
         # Unpack posterior weight and chisq
-        self.posterior = np.array(data[0])
-        self.chisq = np.array(data[1])
+        self.posterior = self._column(data, 0)
+        self.chisq = self._column(data, 1)
 
-        # Unpack x, y and z axis data
-        self.xdata = np.array(data[plot_options.xindex])
-        self.ydata = np.array(data[plot_options.yindex])
-        self.zdata = np.array(data[plot_options.zindex])
+        # Unpack x, y and z axis data, if specified
+        self.xdata = self._column(data, plot_options.xindex)
+        self.ydata = self._column(data, plot_options.yindex)
+        self.zdata = self._column(data, plot_options.zindex)
 
         # List to hold plot specific summary data
         self.summary = []
@@ -58,19 +106,19 @@ class Plot(object):
         # Catch log negative number warnings.
         # Treat warnings as exceptions.
         warnings.filterwarnings('error')
-        if plot_options.logx:
+        if plot_options.logx and self.xdata is not None:
             try:
-                self.xdata = np.log10(self.xdata)
+                self.xdata = self._log10(self.xdata)
             except RuntimeWarning:
                 print "x-data not logged: probably logging a negative."
-        if plot_options.logy:
+        if plot_options.logy and self.ydata is not None:
             try:
-                self.ydata = np.log10(self.ydata)
+                self.ydata = self._log10(self.ydata)
             except RuntimeWarning:
                 print "y-data not logged: probably logging a negative."
-        if plot_options.logz:
+        if plot_options.logz and self.zdata is not None:
             try:
-                self.zdata = np.log10(self.zdata)
+                self.zdata = self._log10(self.zdata)
             except RuntimeWarning:
                 print "z-data not logged: probably logging a negative."
 
@@ -78,6 +126,93 @@ class Plot(object):
         # Omitting this line was the source of annoying bugs!
         warnings.resetwarnings()
 
+    @staticmethod
+    def _column(data, index):
+        """
+        Read-only view of a column of data.
+
+        :param data: Data array or dictionary of columns
+        :type data: numpy.ndarray or dict
+        :param index: Column number, or None
+        :type index: integer
+
+        :returns: View of column, or None if no column number is specified
+        :rtype: numpy.ndarray
+        """
+        if index is None:
+            return None
+        column = np.asarray(data[index]).view()
+        column.setflags(write=False)
+        return column
+
+    @staticmethod
+    def _log10(column):
+        """
+        Read-only log10 of a column of data. The result is kept while the data
+        exists, and shared by plots of the same column.
+
+        :param column: Column of data
+        :type column: numpy.ndarray
+
+        :returns: Log10 of column
+        :rtype: numpy.ndarray
+        """
+        key = (column.__array_interface__['data'][0],
+               column.shape,
+               column.strides,
+               column.dtype.str)
+
+        if key in _LOG_COLUMNS:
+            reference, log_column = _LOG_COLUMNS[key]
+            if reference() is not None:
+                return log_column
+
+        log_column = np.log10(column)
+        log_column.setflags(write=False)
+
+        def forget(_):
+            """ Forget log-scaled column once the data is freed. """
+            _LOG_COLUMNS.pop(key, None)
+
+        base = column if column.base is None else column.base
+        _LOG_COLUMNS[key] = (weakref.ref(base, forget), log_column)
+
+        return log_column
+
+    @abstractmethod
+    def _columns(self):
+        """
+        :returns: Column numbers of statistics and whether they are log-scaled
+        :rtype: tuple
+        """
+        pass
+
+    @abstractmethod
+    def _pdf_options(self):
+        """
+        :returns: Names of options on which the posterior PDF depends
+        :rtype: tuple
+        """
+        pass
+
+    def _shared(self, name, options, func, *args, **kwargs):
+        """
+        Statistic from the analysis context, computed if no plot has computed
+        it yet.
+
+        :param name: Name of statistic
+        :type name: string
+        :param options: Names of options on which the statistic depends
+        :type options: tuple
+        :param func: Function computing the statistic from the arguments
+        :type func: function
+
+        :returns: Statistic
+        """
+        opt = self.plot_options
+        key = (name, self._columns()) + tuple(getattr(opt, option) for option in options)
+        return self.context.statistic(key, func, *args, **kwargs)
+
     def _new_plot(self):
         # Private method to set up a new plot.
         # Returns the figure and axes.
@@ -117,15 +252,14 @@ class OneDimPlot(Plot):
     """
     __metaclass__ = ABCMeta
 
-    def __init__(self, data, plot_options):
-        super(OneDimPlot, self).__init__(data, plot_options)
-        opt = self.plot_options
+    def __init__(self, data, plot_options, context=None):
+        super(OneDimPlot, self).__init__(data, plot_options, context)
 
         # If the user didn't specify bin or plot limits,
         # we find the extent of the data and use that to set them.
         extent = np.zeros(4)
-        extent[0] = min(self.xdata)
-        extent[1] = max(self.xdata)
+        extent[0] = self.xdata.min()
+        extent[1] = self.xdata.max()
         extent[2] = 0
         extent[3] = 1.2
 
@@ -142,54 +276,133 @@ class OneDimPlot(Plot):
                     plot_limits=extent
             )
 
-        # Posterior PDF. Norm by area if not showing profile likelihood,
-        # otherwise norm max value to one.
+    def _columns(self):
+        opt = self.plot_options
+        return ((opt.xindex, opt.logx),)
+
+    def _pdf_options(self):
+        if self.plot_options.kde_pdf:
+            return ("kde_pdf", "bin_limits", "show_prof_like", "bw_method", "kde_gridsize")
+        return ("kde_pdf", "bin_limits", "show_prof_like", "nbins")
+
+    @lazy_property
+    def pdf_data(self):
+        """
+        Posterior PDF. Norm by area if not showing profile likelihood,
+        otherwise norm max value to one.
+        """
+        opt = self.plot_options
+
         if opt.kde_pdf:
-        
+
             # KDE estimate of PDF
-            self.pdf_data = one_dim.kde_posterior_pdf(
+            return self._shared(
+                "pdf_data",
+                self._pdf_options(),
+                one_dim.kde_posterior_pdf,
                 self.xdata,
                 self.posterior,
                 bin_limits=opt.bin_limits,
                 norm_area=not opt.show_prof_like,
-                bw_method=opt.bw_method
-                )
-        else:
-        
-            # Binned estimate of PDF
-            self.pdf_data = one_dim.posterior_pdf(
-                self.xdata,
-                self.posterior,
-                nbins=opt.nbins,
-                bin_limits=opt.bin_limits,
-                norm_area=not opt.show_prof_like
+                bw_method=opt.bw_method,
+                gridsize=opt.kde_gridsize
                 )
 
-        # Profile likelihood
-        self.prof_data = one_dim.prof_data(
+        # Binned estimate of PDF
+        return self._shared(
+            "pdf_data",
+            self._pdf_options(),
+            one_dim.posterior_pdf,
+            self.xdata,
+            self.posterior,
+            nbins=opt.nbins,
+            bin_limits=opt.bin_limits,
+            norm_area=not opt.show_prof_like
+            )
+
+    @lazy_property
+    def prof_data(self):
+        """
+        Profile likelihood.
+        """
+        opt = self.plot_options
+        return self._shared(
+            "prof_data",
+            _PROF_OPTIONS,
+            one_dim.prof_data,
             self.xdata,
             self.chisq,
             nbins=opt.nbins,
             bin_limits=opt.bin_limits)
 
-        # Note the best-fit point is calculated using the raw data,
-        # while the mean, median and mode use the binned PDF.
+    # Note the best-fit point is calculated using the raw data,
+    # while the mean, median and mode use the binned PDF.
 
-        # Best-fit point
-        self.best_fit = stats.best_fit(self.chisq, self.xdata)
-        self.summary.append("Best-fit point: {}".format(self.best_fit))
-
-        # Posterior mean
-        self.posterior_mean = stats.posterior_mean(*self.pdf_data)
-        self.summary.append("Posterior mean: {}".format(self.posterior_mean))
+    @lazy_property
+    def best_fit(self):
+        """
+        Best-fit point.
+        """
+        best_fit = self._shared("best_fit", (), stats.best_fit, self.chisq, self.xdata)
+        return best_fit
 
-        # Posterior median
-        self.posterior_median = one_dim.posterior_median(*self.pdf_data)
-        self.summary.append("Posterior median: {}".format(self.posterior_median))
+    @lazy_property
+    def posterior_mean(self):
+        """
+        Posterior mean.
+        """
+        posterior_mean = self._shared(
+            "posterior_mean",
+            self._pdf_options(),
+            stats.posterior_mean,
+            *self.pdf_data)
+        return posterior_mean
+
+    @lazy_property
+    def credible_regions(self):
+        """
+        Posterior median and credible regions.
+        """
+        return self._shared(
+            "credible_regions",
+            self._pdf_options() + ("alpha",),
+            one_dim.credible_regions,
+            *self.pdf_data,
+            alpha=self.plot_options.alpha)
+
+    @lazy_property
+    def posterior_median(self):
+        """
+        Posterior median.
+        """
+        return self.credible_regions.median
 
-        # Posterior mode
-        self.posterior_modes = one_dim.posterior_mode(*self.pdf_data)
-        self.summary.append("Posterior mode/s: {}".format(self.posterior_modes))
+    @lazy_property
+    def posterior_modes(self):
+        """
+        Posterior mode/s.
+        """
+        posterior_modes = self._shared(
+            "posterior_modes",
+            self._pdf_options(),
+            one_dim.posterior_mode,
+            *self.pdf_data)
+        return posterior_modes
+
+    @lazy_property
+    def conf_intervals(self):
+        """
+        Confidence intervals for each alpha.
+        """
+        return self._shared(
+            "interval_summary",
+            self._pdf_options() + _PROF_OPTIONS + ("alpha",),
+            one_dim.interval_summary,
+            self.pdf_data.pdf,
+            self.pdf_data.bin_centers,
+            self.prof_data.prof_chi_sq,
+            self.prof_data.bin_centers,
+            alpha=self.plot_options.alpha).conf_intervals
 
     def _new_plot(self, point_height=0.08):
         """
@@ -201,6 +414,13 @@ class OneDimPlot(Plot):
         fig, ax = super(OneDimPlot, self)._new_plot()
         opt = self.plot_options
 
+        # Summary of point statistics, whether or not they are shown
+        self.summary = [
+            "Best-fit point: {}".format(self.best_fit),
+            "Posterior mean: {}".format(self.posterior_mean),
+            "Posterior median: {}".format(self.posterior_median),
+            "Posterior mode/s: {}".format(self.posterior_modes)]
+
         # Best-fit point
         if opt.show_best_fit:
             pm.plot_data(self.best_fit, point_height, schemes.best_fit, zorder=2)
@@ -229,17 +449,16 @@ class TwoDimPlot(Plot):
     """
     __metaclass__ = ABCMeta
 
-    def __init__(self, data, plot_options):
-        super(TwoDimPlot, self).__init__(data, plot_options)
-        opt = self.plot_options
+    def __init__(self, data, plot_options, context=None):
+        super(TwoDimPlot, self).__init__(data, plot_options, context)
 
         # If the user didn't specify bin or plot limits,
         # we find the extent of the data and use that to set them.
         extent = np.zeros(4)
-        extent[0] = min(self.xdata)
-        extent[1] = max(self.xdata)
-        extent[2] = min(self.ydata)
-        extent[3] = max(self.ydata)
+        extent[0] = self.xdata.min()
+        extent[1] = self.xdata.max()
+        extent[2] = self.ydata.min()
+        extent[3] = self.ydata.max()
 
         if self.plot_options.bin_limits is None:
             self.plot_options = self.plot_options._replace(
@@ -250,81 +469,184 @@ class TwoDimPlot(Plot):
                     plot_limits=extent
             )
 
-        # Posterior PDF
+    def _columns(self):
+        opt = self.plot_options
+        return ((opt.xindex, opt.logx), (opt.yindex, opt.logy))
+
+    def _pdf_options(self):
+        if self.plot_options.kde_pdf:
+            return ("kde_pdf", "bin_limits", "bw_method", "kde_gridsize")
+        return ("kde_pdf", "bin_limits", "nbins")
+
+    @lazy_property
+    def pdf_data(self):
+        """
+        Posterior PDF.
+        """
+        opt = self.plot_options
+
         if opt.kde_pdf:
-        
+
             # KDE estimate of PDF
-            self.pdf_data = two_dim.kde_posterior_pdf(
+            return self._shared(
+                        "pdf_data",
+                        self._pdf_options(),
+                        two_dim.kde_posterior_pdf,
                         self.xdata,
                         self.ydata,
                         self.posterior,
                         bw_method=opt.bw_method,
+                        gridsize=opt.kde_gridsize,
                         bin_limits=opt.bin_limits)
-        else:
-        
-            # Binned estimate of PDF
-            self.pdf_data = two_dim.posterior_pdf(
-                    self.xdata,
-                    self.ydata,
-                    self.posterior,
-                    nbins=opt.nbins,
-                    bin_limits=opt.bin_limits)
-
-        # Profile likelihood
-        self.prof_data = two_dim.profile_like(
+
+        # Binned estimate of PDF
+        return self._shared(
+                "pdf_data",
+                self._pdf_options(),
+                two_dim.posterior_pdf,
                 self.xdata,
                 self.ydata,
-                self.chisq,
+                self.posterior,
                 nbins=opt.nbins,
                 bin_limits=opt.bin_limits)
 
-        # As with the 1D plots we use raw data for the best-fit point,
-        # and binned data for the mean and mode.
-
-        # Best-fit point
-        self.best_fit_x = stats.best_fit(self.chisq, self.xdata)
-        self.best_fit_y = stats.best_fit(self.chisq, self.ydata)
-        self.summary.append(
-                "Best-fit point (x,y): {}, {}".format(
-                    self.best_fit_x, self.best_fit_y))
-
-        # Posterior mean
-        self.posterior_mean_x = stats.posterior_mean(
-                np.sum(self.pdf_data.pdf, axis=1),
-                self.pdf_data.bin_centers_x)
-        self.posterior_mean_y = stats.posterior_mean(
-                np.sum(self.pdf_data.pdf, axis=0),
-                self.pdf_data.bin_centers_y)
-        self.summary.append(
-                "Posterior mean (x,y): {}, {}".format(
-                        self.posterior_mean_x, self.posterior_mean_y))
+    @lazy_property
+    def prof_data(self):
+        """
+        Profile likelihood.
+        """
+        opt = self.plot_options
+        return self._shared(
+                "prof_data",
+                _PROF_OPTIONS,
+                two_dim.profile_like,
+                self.xdata,
+                self.ydata,
+                self.chisq,
+                nbins=opt.nbins,
+                bin_limits=opt.bin_limits)
 
-        # Posterior mode
-        self.posterior_modes = two_dim.posterior_mode(*self.pdf_data)
-        self.summary.append("Posterior modes/s (x,y): {}".format(self.posterior_modes))
-        
-        # Posterior median
-        self.posterior_median_x = one_dim.posterior_median(
-                np.sum(self.pdf_data.pdf, axis=1),
-                self.pdf_data.bin_centers_x)
-        self.posterior_median_y = one_dim.posterior_median(
-                np.sum(self.pdf_data.pdf, axis=0),
-                self.pdf_data.bin_centers_y)
-        self.summary.append(
-                "Posterior median (x,y): {}, {}".format(
-                        self.posterior_median_x, self.posterior_median_y))
+    @lazy_property
+    def critical_densities(self):
+        """
+        Critical densities of the posterior PDF for each alpha.
+        """
+        return self._shared(
+                "critical_densities",
+                self._pdf_options() + ("alpha",),
+                two_dim.critical_densities,
+                self.pdf_data.pdf,
+                self.plot_options.alpha)
+
+    # As with the 1D plots we use raw data for the best-fit point,
+    # and binned data for the mean and mode.
+
+    @lazy_property
+    def best_fit(self):
+        """
+        Best-fit point (x,y).
+        """
+        best_fit = self._shared(
+            "best_fit",
+            (),
+            lambda: (stats.best_fit(self.chisq, self.xdata),
+                     stats.best_fit(self.chisq, self.ydata)))
+        return best_fit
+
+    @lazy_property
+    def posterior_mean(self):
+        """
+        Posterior mean (x,y).
+        """
+        posterior_mean = self._shared(
+            "posterior_mean",
+            self._pdf_options(),
+            lambda: (
+                stats.posterior_mean(
+                    np.sum(self.pdf_data.pdf, axis=1),
+                    self.pdf_data.bin_centers_x),
+                stats.posterior_mean(
+                    np.sum(self.pdf_data.pdf, axis=0),
+                    self.pdf_data.bin_centers_y)))
+        return posterior_mean
+
+    @lazy_property
+    def posterior_modes(self):
+        """
+        Posterior mode/s (x,y).
+        """
+        posterior_modes = self._shared(
+            "posterior_modes",
+            self._pdf_options(),
+            two_dim.posterior_mode,
+            *self.pdf_data)
+        return posterior_modes
+
+    @lazy_property
+    def posterior_median(self):
+        """
+        Posterior median (x,y).
+        """
+        posterior_median = self._shared(
+            "posterior_median",
+            self._pdf_options(),
+            lambda: (
+                one_dim.posterior_median(
+                    np.sum(self.pdf_data.pdf, axis=1),
+                    self.pdf_data.bin_centers_x),
+                one_dim.posterior_median(
+                    np.sum(self.pdf_data.pdf, axis=0),
+                    self.pdf_data.bin_centers_y)))
+        return posterior_median
+
+    @property
+    def best_fit_x(self):
+        """ Best-fit point, x. """
+        return self.best_fit[0]
+
+    @property
+    def best_fit_y(self):
+        """ Best-fit point, y. """
+        return self.best_fit[1]
+
+    @property
+    def posterior_mean_x(self):
+        """ Posterior mean, x. """
+        return self.posterior_mean[0]
+
+    @property
+    def posterior_mean_y(self):
+        """ Posterior mean, y. """
+        return self.posterior_mean[1]
+
+    @property
+    def posterior_median_x(self):
+        """ Posterior median, x. """
+        return self.posterior_median[0]
+
+    @property
+    def posterior_median_y(self):
+        """ Posterior median, y. """
+        return self.posterior_median[1]
 
     def _new_plot(self):
         fig, ax = super(TwoDimPlot, self)._new_plot()
         opt = self.plot_options
 
+        # Summary of point statistics, whether or not they are shown
+        self.summary = [
+            "Best-fit point (x,y): {}, {}".format(*self.best_fit),
+            "Posterior mean (x,y): {}, {}".format(*self.posterior_mean),
+            "Posterior modes/s (x,y): {}".format(self.posterior_modes),
+            "Posterior median (x,y): {}, {}".format(*self.posterior_median)]
+
         # Best-fit point
         if opt.show_best_fit:
-            pm.plot_data(self.best_fit_x, self.best_fit_y, schemes.best_fit, zorder=2)
+            pm.plot_data(self.best_fit[0], self.best_fit[1], schemes.best_fit, zorder=2)
 
         # Posterior mean
         if opt.show_posterior_mean:
-            pm.plot_data(self.posterior_mean_x, self.posterior_mean_y, schemes.posterior_mean, zorder=2)
+            pm.plot_data(self.posterior_mean[0], self.posterior_mean[1], schemes.posterior_mean, zorder=2)
 
         # Posterior mode
         if opt.show_posterior_mode:
@@ -333,7 +655,7 @@ class TwoDimPlot(Plot):
 
         # Posterior median
         if opt.show_posterior_median:
-            pm.plot_data(self.posterior_median_x, self.posterior_median_y, schemes.posterior_median, zorder=2)
+            pm.plot_data(self.posterior_median[0], self.posterior_median[1], schemes.posterior_median, zorder=2)
 
         return fig, ax
 
@@ -0,0 +1,82 @@
+"""
+===============
+plotlib.context
+===============
+This module contains the analysis context of a chain, which holds statistics
+that are shared by plots of the chain.
+
+Each statistic is computed by the first plot that needs it, e.g. the posterior
+PDF of a pair of parameters is computed once for all plot types of that pair
+with the same options, and any other plot made with the same context reuses it::
+
+    context = AnalysisContext(data)
+    for plot_class in plots.plot_types:
+        plot_class(data, plot_options, context=context).figure()
+
+.. warning::
+    The data of a context is assumed not to be modified.
+"""
+
+import numpy as np
+
+
+def _hashable(value):
+    """
+    :param value: Option or list of options, e.g. bin limits
+    :returns: Value, with lists and arrays replaced by tuples
+    """
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class AnalysisContext(object):
+    """
+    Statistics of a chain, shared by plots of the chain. Statistics are keyed
+    by their name, the data columns and whether they were log-scaled, and the
+    plot options on which they depend, e.g. bins, bin limits and KDE settings.
+
+    :param data: Data dictionary loaded from chain file by :py:mod:`data_loader`
+    :type data: dict
+    """
+    def __init__(self, data):
+        self.data = data
+        self._statistics = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def statistic(self, key, func, *args, **kwargs):
+        """
+        Statistic from the context, computed if it hasn't been computed yet.
+
+        :param key: Key identifying the statistic
+        :type key: tuple
+        :param func: Function computing the statistic from the arguments
+        :type func: function
+
+        :returns: Statistic
+        """
+        key = _hashable(key)
+
+        try:
+            value = self._statistics[key]
+        except KeyError:
+            self.misses += 1
+            value = self._statistics[key] = func(*args, **kwargs)
+        else:
+            self.hits += 1
+
+        return value
+
+    def clear(self):
+        """
+        Forget all statistics, e.g. to free memory.
+        """
+        self._statistics.clear()
+
+    def __len__(self):
+        return len(self._statistics)
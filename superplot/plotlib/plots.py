@@ -68,14 +68,8 @@ class OneDimStandard(OneDimPlot):
             pm.plot_data(self.prof_data.bin_centers, self.prof_data.prof_like, schemes.prof_like)
 
         # Credible regions
-        lower_credible_region = [
-            one_dim.credible_region(
-                    self.pdf_data.pdf, self.pdf_data.bin_centers, alpha=aa, region="lower")
-            for aa in opt.alpha]
-
-        upper_credible_region = [
-            one_dim.credible_region(self.pdf_data.pdf, self.pdf_data.bin_centers, alpha=aa, region="upper")
-            for aa in opt.alpha]
+        lower_credible_region = list(self.credible_regions.lower)
+        upper_credible_region = list(self.credible_regions.upper)
 
         self.summary.append("Lower credible region: {}".format(lower_credible_region))
         self.summary.append("Upper credible region: {}".format(upper_credible_region))
@@ -87,11 +81,7 @@ class OneDimStandard(OneDimPlot):
                 pm.plot_data([lower, upper], [cr_height, cr_height], scheme)
 
         # Confidence intervals
-        conf_intervals = [one_dim.conf_interval(self.prof_data.prof_chi_sq, self.prof_data.bin_centers, alpha=aa) for aa
-                          in
-                          opt.alpha]
-
-        for intervals, scheme in zip(conf_intervals, schemes.conf_intervals):
+        for intervals, scheme in zip(self.conf_intervals, schemes.conf_intervals):
             if opt.show_conf_intervals:
                 # Plot the CI line @ the max PDF value
                 pm.plot_data(intervals, [self.pdf_data.pdf.max()] * int(opt.nbins), scheme)
@@ -194,7 +184,7 @@ class TwoDimPlotFilledPDF(TwoDimPlot):
         opt = self.plot_options
 
         # Credible regions
-        levels = [two_dim.critical_density(self.pdf_data.pdf, aa) for aa in opt.alpha]
+        levels = list(self.critical_densities)
 
         # Make sure pdf is correctly normalised.
         pdf = self.pdf_data.pdf
@@ -257,7 +247,7 @@ class TwoDimPlotPDF(TwoDimPlot):
                     schemes.posterior)
 
         # Credible regions
-        levels = [two_dim.critical_density(self.pdf_data.pdf, aa) for aa in opt.alpha]
+        levels = list(self.critical_densities)
 
         # Make sure pdf is correctly normalised.
         pdf = self.pdf_data.pdf
@@ -347,7 +337,7 @@ class Scatter(TwoDimPlot):
         cb.update_ticks()
 
         # Credible regions
-        levels = [two_dim.critical_density(self.pdf_data.pdf, aa) for aa in opt.alpha]
+        levels = list(self.critical_densities)
 
         # Make sure pdf is correctly normalised
         pdf = self.pdf_data.pdf
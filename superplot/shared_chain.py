@@ -0,0 +1,237 @@
+"""
+============
+shared_chain
+============
+This module places a chain loaded by :py:func:`data_loader.load` in memory
+shared by processes, such that workers, e.g. of a
+:class:`multiprocessing.Pool`, read the chain through zero-copy views rather
+than receiving a pickled copy of it.
+
+The chain is placed in
+
+- the file that it is memory-mapped from, if it was loaded with ``mmap=True``,
+  in which case nothing is copied;
+- otherwise, a temporary file that is memory-mapped by every process. The file
+  is created in ``/dev/shm`` if available, i.e. in memory rather than on disk,
+  and in the default temporary directory otherwise.
+
+Only a small, picklable handle is sent to workers::
+
+    with SharedChain(labels, data) as chain:
+        pool = multiprocessing.Pool(initializer=init_worker, initargs=(chain.handle,))
+
+    def init_worker(handle):
+        global labels, data
+        labels, data = attach(handle)
+
+Data columns in workers are read-only, and are identified by the same tokens
+in the cache of statistics as in the process that loaded the chain.
+"""
+
+import os
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+
+from superplot.statslib import cache as stats_cache
+
+
+SHARED_DIRECTORY = "/dev/shm" if os.path.isdir("/dev/shm") else None
+"""
+Directory for temporary files, in memory if available, or None for the default
+temporary directory.
+"""
+
+ALIGNMENT = 64
+"""
+Alignment in bytes of columns copied to a temporary file.
+"""
+
+
+handle = namedtuple("handle", ("kind", "name", "layout", "labels", "tokens"))
+"""
+Picklable description of a shared chain. The kind of storage is ``"file"``,
+and the name that of the memory-mapped file. The layout is the offset, shape, strides and type of the data array, or a
+dictionary of those of each column.
+"""
+
+
+def _arrays(data):
+    """
+    :param data: Data array or dictionary of columns
+    :type data: numpy.ndarray or dict
+
+    :returns: Arrays of data, keyed by None for a data array
+    :rtype: dict
+    """
+    if isinstance(data, dict):
+        return data
+    return {None: data}
+
+
+def _mapped_file(array):
+    """
+    :param array: Array
+    :type array: numpy.ndarray
+
+    :returns: Name of file that the array is a read-only memory-map of, and
+        offset of the array in the file, or None
+    :rtype: tuple
+    """
+    if not isinstance(array, np.memmap) or array.filename is None or array.flags.writeable:
+        return None
+
+    # The memory-map of the whole file is the last memmap among the bases
+    root = array
+    while isinstance(root.base, np.memmap):
+        root = root.base
+
+    offset = (array.__array_interface__['data'][0] -
+              root.__array_interface__['data'][0] +
+              root.offset)
+
+    return array.filename, offset
+
+
+def _layout(array, offset):
+    """
+    :returns: Offset, shape, strides and type of array
+    :rtype: tuple
+    """
+    return offset, array.shape, array.strides, array.dtype.str
+
+
+def _view(buffer_, layout):
+    """
+    :returns: Read-only view of buffer with layout
+    :rtype: numpy.ndarray
+    """
+    offset, shape, strides, dtype = layout
+    view = np.ndarray(shape, dtype, buffer=buffer_, offset=offset, strides=strides)
+    view.setflags(write=False)
+    return view
+
+
+class SharedChain(object):
+    """
+    Chain placed in memory shared by processes. Workers attach to it with
+    :func:`attach` and its :attr:`handle`.
+
+    A temporary file is removed by :meth:`close`, or at the end of a ``with``
+    block. Workers must not use the chain afterwards.
+
+    :param labels: Labels of chain loaded by :py:func:`data_loader.load`
+    :type labels: dict
+    :param data: Data chain loaded by :py:func:`data_loader.load`
+    :type data: numpy.ndarray or dict
+    :param directory: Directory for temporary file, if the chain is not
+        memory-mapped already
+    :type directory: string
+    """
+    def __init__(self, labels, data, directory=SHARED_DIRECTORY):
+        arrays = _arrays(data)
+        indices = data.keys() if isinstance(data, dict) else range(len(data))
+        tokens = {index: stats_cache.token(data[index]) for index in indices}
+
+        self._temp_file = None
+
+        files = {key: _mapped_file(array) for key, array in arrays.iteritems()}
+        file_names = set(mapped[0] for mapped in files.values() if mapped is not None)
+
+        if None not in files.values() and len(file_names) == 1:
+
+            # Already memory-mapped, so share the file
+            kind = "file"
+            name = file_names.pop()
+            layout = {key: _layout(array, files[key][1]) for key, array in arrays.iteritems()}
+
+        else:
+
+            # Copy contiguous columns to a memory-mapped temporary file
+            layout = dict()
+            size = 0
+            for key, array in arrays.iteritems():
+                strides = tuple(int(np.prod(array.shape[axis + 1:])) * array.itemsize
+                                for axis in range(array.ndim))
+                layout[key] = (size, array.shape, strides, array.dtype.str)
+                size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+            size = max(size, 1)
+
+            kind = "file"
+            file_descriptor, name = tempfile.mkstemp(prefix="superplot_", suffix=".chain", dir=directory)
+            os.close(file_descriptor)
+            self._temp_file = name
+            buffer_ = np.memmap(name, dtype=np.uint8, mode="w+", shape=(size,))
+
+            for key, array in arrays.iteritems():
+                offset, shape, strides, dtype = layout[key]
+                copy = np.ndarray(shape, dtype, buffer=buffer_, offset=offset, strides=strides)
+                copy[...] = array
+                del copy
+
+            buffer_.flush()
+            del buffer_
+
+        if not isinstance(data, dict):
+            layout = layout[None]
+
+        self.handle = handle(kind, name, layout, labels, tokens)
+        """
+        Handle with which workers attach to the chain.
+        """
+
+    def close(self):
+        """
+        Remove the temporary file, if any. Views of it that still exist keep
+        it mapped until they are freed.
+        """
+        if self._temp_file is not None:
+            try:
+                os.remove(self._temp_file)
+            except OSError:
+                pass
+            self._temp_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _buffer(handle_):
+    """
+    :param handle_: Handle of shared chain
+    :type handle_: handle
+
+    :returns: Read-only memory-map of shared chain
+    :rtype: numpy.memmap
+    """
+    return np.memmap(handle_.name, dtype=np.uint8, mode="r")
+
+
+def attach(handle_):
+    """
+    Zero-copy, read-only views of a shared chain. Data columns are registered
+    with the cache of statistics with the tokens of the original columns.
+
+    :param handle_: Handle of shared chain
+    :type handle_: handle
+
+    :returns: Labels and data of chain
+    :rtype: dict (labels), array or dict (data)
+    """
+    buffer_ = _buffer(handle_)
+
+    if isinstance(handle_.layout, dict):
+        data = {index: _view(buffer_, layout) for index, layout in handle_.layout.iteritems()}
+    else:
+        data = _view(buffer_, handle_.layout)
+
+    for index, token in handle_.tokens.iteritems():
+        if token is not None:
+            stats_cache.register(data[index], token)
+
+    return handle_.labels, data
@@ -0,0 +1,450 @@
+"""
+=================
+Persistent cache
+=================
+This module contains a cache for the results of statistical functions that
+persists between processes, replacing joblib's temporary ``Memory``.
+
+Results are stored with :func:`joblib.dump` in a directory set in the
+``cache`` section of ``config.yml``, and the least recently used results are
+deleted once the cache exceeds its maximum size.
+
+Results are keyed by the function and its arguments. The key includes the
+sources of all modules in :mod:`superplot.statslib` and the version of numpy,
+so that results are recomputed if a function that the cached function calls
+is changed, or superplot is upgraded. Hashing large data
+columns is expensive, so columns read from a chain by
+:mod:`superplot.data_loader` are registered with a cheap token - the
+fingerprints of the chain's files and the index of the column - which is used
+in place of their content. Other arrays are hashed with :func:`joblib.hash`;
+the hash of an array that is read-only, as are all of its bases, is computed
+once and registered as its token.
+
+Recently used results are also kept in memory, so repeated calls within a
+process don't read from disk. A read-only copy of a result is kept in memory,
+and callers receive their own copies, which they may modify.
+
+Only expensive functions, e.g. binning a chain or KDE, should be cached. The
+hits, misses and time spent hashing and computing for each function are
+recorded; see :meth:`PersistentCache.report`.
+
+.. warning::
+    Registered and read-only arrays are assumed not to be modified in place.
+"""
+
+import os
+import inspect
+import hashlib
+import weakref
+import warnings
+from collections import OrderedDict
+from functools import update_wrapper
+from timeit import default_timer as timer
+
+import appdirs
+import joblib
+import numpy as np
+
+from superplot.plot_options import CONFIG
+
+
+DEFAULT_MAX_SIZE = 500
+"""
+Default maximum size of cache in megabytes.
+"""
+
+EVICT_FRACTION = 0.8
+"""
+Fraction of maximum size to which cache is reduced after it is exceeded.
+"""
+
+MEMO_SIZE = 64
+"""
+Number of recently used results kept in memory.
+"""
+
+COUNTERS = ("memory_hits", "disk_hits", "misses", "hash_time", "compute_time")
+"""
+Statistics recorded for each cached function.
+"""
+
+
+def _statslib_hash():
+    """
+    :returns: Hash of the sources of the modules in statslib, and the version
+        of numpy
+    :rtype: string
+    """
+    md5 = hashlib.md5(np.__version__)
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.endswith(".py"):
+            with open(os.path.join(directory, file_name), "rb") as source:
+                md5.update(source.read())
+
+    return md5.hexdigest()
+
+
+_STATSLIB_HASH = _statslib_hash()
+
+
+# Tokens of registered arrays, keyed by the address and layout of their data.
+# A weak reference to the array checks that the address hasn't been reused.
+_TOKENS = dict()
+
+
+def _layout(array):
+    """
+    :param array: Array
+    :type array: numpy.ndarray
+
+    :returns: Address, shape, strides and type of data of array
+    :rtype: tuple
+    """
+    return (array.__array_interface__['data'][0],
+            array.shape,
+            array.strides,
+            array.dtype.str)
+
+
+def register(array, token):
+    """
+    Register a cheap token that identifies the content of an array, e.g. a
+    data column read from a chain. Views of the same data with the same layout
+    share the token.
+
+    :param array: Array
+    :type array: numpy.ndarray
+    :param token: Hashable token identifying the content
+    :type token: tuple
+    """
+    layout = _layout(array)
+    base = array if array.base is None else array.base
+
+    def unregister(_):
+        """ Forget token once the data is freed. """
+        _TOKENS.pop(layout, None)
+
+    try:
+        reference = weakref.ref(base, unregister)
+    except TypeError:
+        return
+
+    _TOKENS[layout] = (reference, token)
+
+
+def token(array):
+    """
+    :param array: Array
+    :type array: numpy.ndarray
+
+    :returns: Registered token of array, or None
+    :rtype: tuple
+    """
+    try:
+        reference, token_ = _TOKENS[_layout(array)]
+    except (KeyError, AttributeError):
+        return None
+
+    if reference() is None:
+        return None
+
+    return token_
+
+
+def _argument_key(argument):
+    """
+    :param argument: Argument of cached function
+    :returns: Argument, with registered arrays replaced by their tokens
+    """
+    token_ = token(argument)
+    if token_ is not None:
+        return ("registered", token_)
+
+    # Read-only arrays are hashed once
+    if isinstance(argument, np.ndarray) and _immutable(argument):
+        token_ = ("hash", joblib.hash(argument))
+        register(argument, token_)
+        return ("registered", token_)
+
+    if isinstance(argument, (list, tuple)):
+        return type(argument)(_argument_key(item) for item in argument)
+    return argument
+
+
+def _immutable(array):
+    """
+    :param array: Array
+    :type array: numpy.ndarray
+
+    :returns: Whether the array and all of its bases are read-only, such that
+        its data cannot be modified through another array
+    :rtype: bool
+    """
+    while isinstance(array, np.ndarray):
+        if array.flags.writeable:
+            return False
+        array = array.base
+    return True
+
+
+def _copy(result, write=True):
+    """
+    Copy arrays in a result, so that a result kept in memory and the results
+    returned to callers are independent.
+
+    :param result: Result of function
+    :param write: Whether copies of arrays are writeable
+    :type write: bool
+
+    :returns: Copy of result
+    """
+    if isinstance(result, np.ndarray):
+        result = result.copy()
+        result.setflags(write=write)
+        return result
+    if isinstance(result, list):
+        return [_copy(item, write) for item in result]
+    if isinstance(result, tuple):
+        items = [_copy(item, write) for item in result]
+        if hasattr(result, "_fields"):
+            return type(result)(*items)
+        return type(result)(items)
+    return result
+
+
+class PersistentCache(object):
+    """
+    Cache of results of functions in a directory, with least recently used
+    results deleted once it exceeds a maximum size.
+
+    Cached functions must be doctestable, so the decorator returns a
+    function with the correct ``__doc__`` attribute.
+
+    :param directory: Directory for cache
+    :type directory: string
+    :param max_size: Maximum size of cache in megabytes. If zero, results are
+        not cached.
+    :type max_size: float
+    """
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size * 2**20
+        self._memo = OrderedDict()
+        self._counters = dict()
+
+    def cache(self, func):
+        """
+        Decorate a function such that its results are cached. The original
+        function is the ``__wrapped__`` attribute of the cached function.
+
+        :param func: Function to cache
+        :type func: function
+
+        :returns: Cached function
+        :rtype: function
+        """
+        if not self.max_size:
+            return func
+
+        try:
+            source = inspect.getsource(func)
+        except (IOError, TypeError):
+            source = func.__code__.co_code
+
+        name = "{}.{}".format(func.__module__, func.__name__)
+        func_dir = os.path.join(self.directory, name)
+        func_hash = hashlib.md5(_STATSLIB_HASH + source).hexdigest()
+        counters = self._counters.setdefault(name, dict.fromkeys(COUNTERS, 0))
+
+        def cfunc(*args, **kwargs):
+            start = timer()
+            arguments = inspect.getcallargs(func, *args, **kwargs)
+            arguments = {key: _argument_key(value) for key, value in arguments.iteritems()}
+            key = joblib.hash((func_hash, arguments))
+            counters["hash_time"] += timer() - start
+
+            if key in self._memo:
+                counters["memory_hits"] += 1
+                result = self._memo.pop(key)
+                self._memo[key] = result
+                return _copy(result)
+
+            file_name = os.path.join(func_dir, key + ".pkl")
+
+            try:
+                result = joblib.load(file_name)
+            except Exception:
+                counters["misses"] += 1
+                start = timer()
+                result = func(*args, **kwargs)
+                counters["compute_time"] += timer() - start
+                self._store(result, file_name)
+            else:
+                counters["disk_hits"] += 1
+                # Mark as recently used
+                try:
+                    os.utime(file_name, None)
+                except OSError:
+                    pass
+
+            self._memo[key] = _copy(result, write=False)
+            while len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+
+            return result
+
+        update_wrapper(cfunc, func)
+        cfunc.__wrapped__ = func
+        return cfunc
+
+    def _store(self, result, file_name):
+        """
+        Store a result, and evict least recently used results if the cache is
+        too large. Failure to store a result only results in a warning.
+
+        :param result: Result of function
+        :param file_name: Name of file for result
+        :type file_name: string
+        """
+        temp_name = "{}.{}.tmp".format(file_name, os.getpid())
+
+        try:
+            if not os.path.isdir(os.path.dirname(file_name)):
+                os.makedirs(os.path.dirname(file_name))
+            joblib.dump(result, temp_name)
+            os.rename(temp_name, file_name)
+        except Exception:
+            warnings.warn("Could not write cache {}".format(file_name))
+            try:
+                os.remove(temp_name)
+            except OSError:
+                pass
+            return
+
+        self.evict()
+
+    def evict(self, max_size=None):
+        """
+        Delete least recently used results until the cache is no larger than
+        a fraction of its maximum size, if it exceeds its maximum size.
+
+        :param max_size: Maximum size in bytes, by default that of the cache
+        :type max_size: float
+        """
+        if max_size is None:
+            max_size = self.max_size
+
+        entries = []
+        for dir_path, _, file_names in os.walk(self.directory):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        size = sum(entry[1] for entry in entries)
+        if size <= max_size:
+            return
+
+        for _, file_size, path in sorted(entries):
+            if size <= EVICT_FRACTION * max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= file_size
+
+    def clear(self):
+        """
+        Delete all cached results.
+        """
+        self._memo.clear()
+        self.evict(max_size=-1)
+
+    def statistics(self):
+        """
+        :returns: Hits from memory and disk, misses, and time spent hashing
+            arguments and computing results, for each cached function
+        :rtype: dict
+        """
+        return {name: dict(counters) for name, counters in self._counters.iteritems()}
+
+    def add_statistics(self, statistics):
+        """
+        Add statistics of the same cache in another process, e.g. a worker of
+        a pool, to those of this process.
+
+        :param statistics: Statistics from :meth:`statistics`
+        :type statistics: dict
+        """
+        for name, counters in statistics.iteritems():
+            totals = self._counters.setdefault(name, dict.fromkeys(COUNTERS, 0))
+            for counter, value in counters.iteritems():
+                totals[counter] += value
+
+    def report(self):
+        """
+        :returns: Table of hit rates and time spent hashing and computing for
+            each cached function that has been called
+        :rtype: string
+        """
+        lines = ["{:<45} {:>6} {:>8} {:>10} {:>10}".format(
+            "Function", "Calls", "Hit rate", "Hashing/s", "Compute/s")]
+
+        for name, counters in sorted(self._counters.iteritems()):
+            hits = counters["memory_hits"] + counters["disk_hits"]
+            calls = hits + counters["misses"]
+            if not calls:
+                continue
+            lines.append("{:<45} {:>6} {:>8.0%} {:>10.3f} {:>10.3f}".format(
+                name, calls, float(hits) / calls, counters["hash_time"], counters["compute_time"]))
+
+        return "\n".join(lines)
+
+
+def _default_cache():
+    """
+    :returns: Cache configured in ``config.yml``
+    :rtype: PersistentCache
+    """
+    config = CONFIG.get("cache") or dict()
+
+    directory = config.get("directory")
+    if directory is None:
+        directory = appdirs.user_cache_dir("superplot")
+    directory = os.path.expanduser(directory)
+
+    max_size = config.get("max_size")
+    if max_size is None:
+        max_size = DEFAULT_MAX_SIZE
+
+    return PersistentCache(directory, max_size)
+
+
+memory = _default_cache()
+
+
+def test_function():
+    """
+    >>> import shutil
+    >>> import tempfile
+    >>> directory = tempfile.mkdtemp()
+    >>> cached = PersistentCache(directory).cache(test_function)
+    >>> cached() == cached()
+    True
+    >>> PersistentCache(directory).cache(test_function)() == cached()
+    True
+    >>> shutil.rmtree(directory)
+    """
+    from random import random
+    return random()
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -11,14 +11,41 @@ See `discussion on stackoverflow <http://stackoverflow.com/questions/27623919/we
 
 """
 
+import warnings
+from itertools import product
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
 import numpy as np
 from numpy import pi
-from scipy.spatial.distance import cdist
 from scipy.signal import fftconvolve
-from scipy.interpolate import interp1d
-from scipy.interpolate import interp2d
-from scipy.stats import norm
-from scipy.stats import multivariate_normal
+from scipy.spatial import cKDTree
+from scipy.interpolate import RegularGridInterpolator
+
+
+# Grid for FFT. If its size isn't specified, the grid spacing is a fraction
+# of the kernel width, within limits on the number of points per dimension.
+# In more dimensions than listed, the limit is such that the total number of
+# grid points is at most MAX_GRID_POINTS.
+GRID_POINTS_PER_SIGMA = 5.
+MIN_GRIDSIZE = 32
+MAX_GRIDSIZE = {1: 2**14, 2: 2**9, 3: 2**7}
+MAX_GRID_POINTS = 2**21
+
+# Kernel is truncated and grid is padded at this many standard deviations
+KERNEL_TRUNCATE = 4.
+
+# Maximum memory in bytes for the blocks of kernel evaluations without FFT
+MAX_MEMORY = 2**27
+
+# Default number of threads for evaluating kernels without FFT and scoring
+# bandwidths, or None for the number of CPUs. Processes that already run in
+# parallel, e.g. workers of a pool, should lower it to avoid oversubscription.
+PROCESSES = None
+
+# Candidate bandwidths for cross-validation, relative to Scott's rule. Scott's
+# rule oversmooths multimodal distributions, so most candidates are narrower.
+CV_FACTORS = np.logspace(-5., 2., 29, base=2.)
 
 
 class gaussian_kde(object):
@@ -38,7 +65,9 @@ class gaussian_kde(object):
         array, otherwise a 2-D array with shape (# of dims, # of data).
     bw_method : str, scalar or callable, optional
         The method used to calculate the estimator bandwidth.  This can be
-        'scott', 'silverman', a scalar constant or a callable.  If a scalar,
+        'scott', 'silverman', 'lscv', 'mlcv', a scalar constant or a callable.
+        'lscv' and 'mlcv' select from candidate bandwidths by least-squares or
+        likelihood cross-validation on the binned dataset.  If a scalar,
         this will be used directly as `kde.factor`.  If a callable, it should
         take a `gaussian_kde` instance as only parameter and return a scalar.
         If None (default), 'scott' is used.  See Notes for more details.
@@ -47,7 +76,25 @@ class gaussian_kde(object):
         only contributes its associated weight towards the bin count
         (instead of 1).
     fft : bool
-        Whether to use Fast-fourier transforms. Can be much faster.
+        Whether to use Fast-fourier transforms. Can be much faster. The dataset
+        is binned on a grid in any number of dimensions, though the size of
+        the grid per dimension is limited in more than three.
+    gridsize : int or sequence of ints, optional
+        Number of points per dimension in the grid for the FFT. If None
+        (default), chosen from the bandwidth, such that the cost doesn't
+        grow with the number of datapoints beyond binning them.
+    max_memory : int, optional
+        Memory in bytes available for evaluating kernels without FFT. The
+        kernels are evaluated in blocks of points and datapoints that fit in
+        this budget.
+    processes : int, optional
+        Number of threads for evaluating blocks of kernels without FFT and
+        scoring bandwidths for cross-validation. If None (default),
+        `PROCESSES` threads, which by default is the number of CPUs.
+    cutoff : float, optional
+        If not None, without FFT, sum only kernels of datapoints within this
+        many bandwidths of each point, found with a k-d tree. The error is
+        bounded by `kde.truncation_error`.
 
     Attributes
     ----------
@@ -67,6 +114,9 @@ class gaussian_kde(object):
         (`kde.factor`).
     inv_cov : ndarray
         The inverse of `covariance`.
+    truncation_error : float
+        Upper bound on the absolute error in the pdf at any point from
+        summing only kernels within `cutoff` bandwidths.
 
     Methods
     -------
@@ -76,6 +126,8 @@ class gaussian_kde(object):
         Same as kde.evaluate(points)
     kde.pdf(points) : ndarray
         Alias for ``kde.evaluate(points)``.
+    kde.grid(*centers) : ndarray
+        Evaluate the estimated pdf on a regular grid of points.
     kde.set_bandwidth(bw_method='scott') : None
         Computes the bandwidth, i.e. the coefficient that multiplies the data
         covariance matrix to obtain the kernel covariance matrix.
@@ -158,11 +210,45 @@ class gaussian_kde(object):
     >>> ax.set_ylim([ymin, ymax])
     >>> plt.show()
 
+    Select the bandwidth by least-squares or likelihood cross-validation. For
+    this Gaussian data, it is close to Scott's rule:
+
+    >>> scott = gaussian_kde(values).bandwidth
+    >>> lscv = gaussian_kde(values, bw_method='lscv').bandwidth
+    >>> mlcv = gaussian_kde(values, bw_method='mlcv').bandwidth
+    >>> 0.5 < lscv / scott < 2. and 0.5 < mlcv / scott < 2.
+    True
+
+    whereas Scott's rule oversmooths bimodal data:
+
+    >>> bimodal = np.concatenate([np.random.normal(-5., size=1000),
+    ...                           np.random.normal(5., size=1000)])
+    >>> scott = gaussian_kde(bimodal).bandwidth
+    >>> gaussian_kde(bimodal, bw_method='lscv').bandwidth < 0.5 * scott
+    True
+    >>> gaussian_kde(bimodal, bw_method='mlcv').bandwidth < 0.5 * scott
+    True
+
+    Without FFT, summing only kernels within a cutoff of each point is within
+    `truncation_error` of the exact evaluation:
+
+    >>> exact = gaussian_kde(values, fft=False)(positions)
+    >>> tree = gaussian_kde(values, fft=False, cutoff=3.)
+    >>> np.all(abs(tree(positions) - exact) <= tree.truncation_error)
+    True
+
     """
 
-    def __init__(self, dataset, bw_method='scott', weights=None, fft=True):
+    def __init__(self, dataset, bw_method='scott', weights=None, fft=True,
+                 gridsize=None, max_memory=MAX_MEMORY, processes=None,
+                 cutoff=None):
 
         self.fft = fft
+        self.gridsize = gridsize
+        self.max_memory = max_memory
+        self.processes = processes
+        self.cutoff = cutoff
+        self._tree = None
         self.dataset = np.atleast_2d(dataset)
         assert self.dataset.size > 1, "dataset input should have multiple elements"
 
@@ -179,16 +265,26 @@ class gaussian_kde(object):
             self.bandwidth = self._scott_factor()
         elif bw_method == 'silverman':
             self.bandwidth = self._silverman_factor()
+        elif bw_method in ('lscv', 'mlcv'):
+            self.bandwidth = self._cv_factor(bw_method)
         elif np.isscalar(bw_method):
             self.bandwidth = bw_method
         elif callable(bw_method):
             self.bandwidth = bw_method(self)
         else:
-            error = "bw_method should be 'scott', 'silverman', a scalar or a callable"
+            error = ("bw_method should be 'scott', 'silverman', 'lscv', 'mlcv', "
+                     "a scalar or a callable")
             raise ValueError(error)
 
         self._compute_covariance()
 
+        # Omitted kernels are at least cutoff bandwidths away and their
+        # weights sum to at most one
+        if self.cutoff is not None:
+            self.truncation_error = self._gauss_norm() * np.exp(-0.5 * self.cutoff**2)
+        else:
+            self.truncation_error = 0.
+
         if self.fft:
             self._fft_kde_func = self._fft_kde()
 
@@ -205,119 +301,169 @@ class gaussian_kde(object):
 
         if self.fft:
             return self._fft_kde_func(points)
+        elif self.cutoff is not None:
+            return self._tree_kde_func(points)
         else:
             return self._kde_func(points)
 
-    def _bin_dataset(self):
+    def grid(self, *centers):
         """
-        Histogram dataset so that it is uniformly spaced. Once it is uniformly
-        spaced, one can apply a discrete fast-Fourier transform.
+        Evaluate the estimated pdf on a regular grid of points.
 
-        :returns: Binned pdf and bin centers
-        :rtype: tuple(np.array, np.array)
-        """
-        if self.n_dims == 1:
-
-            nbins = self.len_data
-            binned_pdf, bin_edges = np.histogram(self.dataset[0],
-                                                 bins=nbins,
-                                                 normed=True,
-                                                 weights=self.weights)
-            bin_centers = np.array((bin_edges[:-1] + bin_edges[1:]) * 0.5)
-
-        elif self.n_dims == 2:
-
-            nbins = int(self.len_data**0.5)
-            binned_pdf, bin_edges_x, bin_edges_y = np.histogram2d(self.dataset[0],
-                                                                  self.dataset[1],
-                                                                  bins=nbins,
-                                                                  normed=True,
-                                                                  weights=self.weights)
-            bin_centers_x = 0.5 * (bin_edges_x[:-1] + bin_edges_x[1:])
-            bin_centers_y = 0.5 * (bin_edges_y[:-1] + bin_edges_y[1:])
-            bin_centers = [np.array(bin_centers_x), np.array(bin_centers_y)]
+        :param centers: Coordinates of grid points along each dimension
+        :type centers: np.array, one per dimension
 
-        else:
-            raise ValueError("Bining only implemented in 1 or 2 dimesions")
+        :returns: KDE, with one index per dimension
+        :rtype: np.array (# of points in 1st dimension, ...)
+        """
+        message = "grid dimension, {} != dataset dimension, {}"
+        assert len(centers) == self.n_dims, message.format(len(centers), self.n_dims)
 
-        return binned_pdf, bin_centers
+        mesh = np.meshgrid(*centers, indexing='ij')
+        points = np.array([coordinate.ravel() for coordinate in mesh])
 
+        return np.reshape(self(points), mesh[0].shape)
 
-    def _fft_kde(self):
+    def _grid(self, sigma=None, pad_sigma=None):
         """
-        Discrete fast-Fourier transform of binned pdf with a Gaussian kernel.
+        Uniformly spaced grid for FFT. The grid covers the dataset, padded by
+        the truncation of the kernel.
+
+        :param sigma: Kernel widths that set the grid spacing, by default
+            those of the covariance
+        :type sigma: np.array
+        :param pad_sigma: Kernel widths that set the padding, by default
+            `sigma`
+        :type pad_sigma: np.array
+
+        :returns: Coordinates of grid points along each dimension
+        :rtype: list(np.array)
+        """
+        if sigma is None:
+            sigma = np.diag(self.cov)**0.5
+        if pad_sigma is None:
+            pad_sigma = sigma
+
+        lower = self.dataset.min(axis=1) - KERNEL_TRUNCATE * pad_sigma
+        upper = self.dataset.max(axis=1) + KERNEL_TRUNCATE * pad_sigma
+
+        if self.gridsize is None:
+            gridsize = np.ceil((upper - lower) / sigma * GRID_POINTS_PER_SIGMA) + 1
+            max_gridsize = MAX_GRIDSIZE.get(self.n_dims,
+                                            int(MAX_GRID_POINTS**(1. / self.n_dims)))
+            gridsize = np.clip(gridsize, min(MIN_GRIDSIZE, max_gridsize), max_gridsize)
+        else:
+            gridsize = np.ones(self.n_dims) * self.gridsize
 
-        :returns: Function for interpolating binned pdf convolved with Gaussian
-        kernel
-        :rtype: func
+        return [np.linspace(l, u, int(g)) for l, u, g in zip(lower, upper, gridsize)]
+
+    def _bin_dataset(self, grid=None, weights=None):
+        """
+        Linearly bin dataset on a uniform grid, i.e. share the weight of each
+        datapoint between the neighbouring grid points in proportion to its
+        proximity. Once it is uniformly spaced, one can apply a discrete
+        fast-Fourier transform.
+
+        :param grid: Coordinates of grid points along each dimension, by
+            default from :meth:`_grid`
+        :type grid: list(np.array)
+        :param weights: Weights to bin, by default those of the dataset
+        :type weights: np.array
+
+        :returns: Binned pdf and grid points along each dimension
+        :rtype: tuple(np.array, list(np.array))
         """
-        if self.n_dims == 1:
+        if grid is None:
+            grid = self._grid()
+        if weights is None:
+            weights = self.weights
 
-            binned_pdf, bin_centers = self._bin_dataset()
-            mean_bin = np.mean(bin_centers)
+        shape = tuple(len(points) for points in grid)
 
-            def gauss_kernel(x):
-                """ 1D Gaussian kernel. """
-                return norm.pdf(x, loc=mean_bin, scale=self.det_cov**0.5)
+        lower_index = np.empty(self.dataset.shape, dtype=int)
+        fraction = np.empty(self.dataset.shape)
 
-            gauss_bin_centers = gauss_kernel(bin_centers)
+        for dim, points in enumerate(grid):
+            position = (self.dataset[dim] - points[0]) / (points[1] - points[0])
+            lower_index[dim] = np.clip(np.floor(position), 0, len(points) - 2)
+            fraction[dim] = position - lower_index[dim]
 
-            pdf = fftconvolve(binned_pdf, gauss_bin_centers, mode='same')
-            pdf = np.real(pdf)
+        # Sum weights shared with each corner of the grid cell containing
+        # each datapoint
+        binned_pdf = np.zeros(np.prod(shape))
 
-            bin_width = bin_centers[1] - bin_centers[0]
-            pdf /= pdf.sum() * bin_width
+        for corner in product((0, 1), repeat=self.n_dims):
+            corner_weights = weights.copy()
+            for dim, upper in enumerate(corner):
+                corner_weights *= fraction[dim] if upper else 1. - fraction[dim]
+            index = np.ravel_multi_index(lower_index + np.array(corner)[:, None], shape)
+            binned_pdf += np.bincount(index, weights=corner_weights, minlength=binned_pdf.size)
 
-            kde = interp1d(bin_centers,
-                           pdf,
-                           bounds_error=False,
-                           fill_value=0.)
+        binned_pdf = np.reshape(binned_pdf, shape)
+        binned_pdf /= np.prod([points[1] - points[0] for points in grid])
 
-            def kde_func(points):
-                """ Pass array of points through KDE interpolation function. """
-                kde_ = np.array([max(0., kde(x)) for x in points])
-                return kde_
+        return binned_pdf, grid
 
-            return kde_func
+    def _kernel(self, grid, cov=None):
+        """
+        Gaussian kernel on grid, centered on a grid point and truncated, so
+        that it has an odd number of points in each dimension.
 
-        elif self.n_dims == 2:
+        :param grid: Coordinates of grid points along each dimension
+        :type grid: list(np.array)
+        :param cov: Covariance of kernel, by default that of the KDE
+        :type cov: np.array
 
-            binned_pdf, (bin_centers_x, bin_centers_y) = self._bin_dataset()
-            mean_bin = [np.mean(bin_centers_x), np.mean(bin_centers_y)]
+        :returns: Kernel, normalized such that it sums to one
+        :rtype: np.array
+        """
+        if cov is None:
+            cov = self.cov
+
+        sigma = np.diag(cov)**0.5
+        inv_cov = np.linalg.inv(cov)
+        offsets = []
+
+        for dim, points in enumerate(grid):
+            spacing = points[1] - points[0]
+            half_width = int(np.ceil(KERNEL_TRUNCATE * sigma[dim] / spacing))
+            half_width = min(half_width, len(points) - 1)
+            offsets.append(np.arange(-half_width, half_width + 1) * spacing)
 
-            def gauss_kernel(x):
-                """ 2D Gaussian kernel. """
-                return multivariate_normal.pdf(x, mean=mean_bin, cov=self.cov)
+        mesh = np.meshgrid(*offsets, indexing='ij')
+        displacement = np.array([coordinate.ravel() for coordinate in mesh])
+        chi_squared = np.sum(displacement * np.dot(inv_cov, displacement), axis=0)
 
-            grid_x, grid_y = np.meshgrid(bin_centers_x, bin_centers_y)
-            grid = np.column_stack([grid_x.flatten(), grid_y.flatten()])
+        kernel = np.reshape(np.exp(-0.5 * chi_squared), mesh[0].shape)
+        return kernel / kernel.sum()
 
-            gauss_bin_centers = gauss_kernel(grid)
-            gauss_bin_centers = np.reshape(gauss_bin_centers, binned_pdf.shape, order='F')
+    def _fft_kde(self):
+        """
+        Discrete fast-Fourier transform of binned pdf with a Gaussian kernel.
 
-            pdf = fftconvolve(binned_pdf, gauss_bin_centers, mode='same')
-            pdf = np.real(pdf)
+        :returns: Function for interpolating binned pdf convolved with Gaussian
+        kernel
+        :rtype: func
+        """
+        binned_pdf, grid = self._bin_dataset()
 
-            bin_width_x = bin_centers_x[1] - bin_centers_x[0]
-            bin_width_y = bin_centers_y[1] - bin_centers_y[0]
-            bin_vol = bin_width_x * bin_width_y
-            pdf /= pdf.sum() * bin_vol
+        pdf = fftconvolve(binned_pdf, self._kernel(grid), mode='same')
+        pdf = np.real(pdf)
 
-            kde = interp2d(bin_centers_x,
-                           bin_centers_y,
-                           pdf.T,
-                           bounds_error=False,
-                           fill_value=0.)
+        bin_vol = np.prod([points[1] - points[0] for points in grid])
+        pdf /= pdf.sum() * bin_vol
 
-            def kde_func(points):
-                """ Pass array of points through KDE interpolation function. """
-                kde_ = np.array([max(0., kde(x, y)) for x, y in points.T])
-                return kde_
+        kde = RegularGridInterpolator(tuple(grid),
+                                      pdf,
+                                      bounds_error=False,
+                                      fill_value=0.)
 
-            return kde_func
+        def kde_func(points):
+            """ Pass array of points through KDE interpolation function. """
+            kde_ = np.maximum(0., kde(np.atleast_2d(points).T))
+            return kde_
 
-        else:
-            raise ValueError("FFT only implemented in 1 or 2 dimesions")
+        return kde_func
 
     def _kde_func(self, points):
         """
@@ -341,17 +487,209 @@ class gaussian_kde(object):
 
         """
         points = np.atleast_2d(points)
-        n_dims, _ = points.shape
+        n_dims, n_points = points.shape
 
         message = "points dimension, {} != dataset dimension, {}"
         assert n_dims == self.n_dims, message.format(n_dims, self.n_dims)
 
-        chi_squared = cdist(points.T, self.dataset.T, 'mahalanobis', VI=self.inv_cov)**2
-        gauss_norm = (2. * pi)**(-0.5 * self.n_dims)
-        gauss_kernel = gauss_norm * self.det_cov**-0.5 * np.exp(-0.5 * chi_squared)
-        pdf = np.sum(gauss_kernel * self.weights, axis=1)
+        # Chi-squared is a squared Euclidean distance between whitened points,
+        # |x - y|^2 = |x|^2 + |y|^2 - 2 x.y
+        points = self._whiten(points)
+        dataset = self._whiten(self.dataset)
+
+        points_squared = np.sum(points**2, axis=0)
+        dataset_squared = np.sum(dataset**2, axis=0)
+
+        processes = self._threads(n_points)
+
+        # Blocks of points x datapoints, one per process, that fit in memory
+        block_size = max(1, self.max_memory // (8 * 3 * processes))
+        block_points = min(-(-n_points // processes), block_size)
+        block_data = max(1, block_size // block_points)
+
+        def block_pdf(start):
+            """ Sum kernels of all datapoints at a block of points. """
+            block = slice(start, start + block_points)
+            pdf = np.zeros(len(points_squared[block]))
+
+            for start_data in range(0, self.len_data, block_data):
+                block_ = slice(start_data, start_data + block_data)
+                chi_squared = np.dot(points[:, block].T, dataset[:, block_])
+                chi_squared *= -2.
+                chi_squared += points_squared[block, None]
+                chi_squared += dataset_squared[block_]
+                np.maximum(chi_squared, 0., out=chi_squared)
+                chi_squared *= -0.5
+                pdf += np.dot(np.exp(chi_squared, out=chi_squared), self.weights[block_])
+
+            return pdf
+
+        starts = range(0, n_points, block_points)
+
+        if processes > 1:
+            pool = ThreadPool(processes)
+            try:
+                pdf = pool.map(block_pdf, starts)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            pdf = map(block_pdf, starts)
+
+        return self._gauss_norm() * np.concatenate(pdf)
+
+    def _tree_kde_func(self, points):
+        """
+        Evaluate the estimated pdf on a set of points, summing only kernels of
+        datapoints within `cutoff` bandwidths of each point.
+
+        Pairs of points and datapoints are found with k-d trees of whitened
+        coordinates. Points are split into blocks for which the pairs fit in
+        `max_memory`.
 
-        return pdf
+        :param points: Arguments of KDE estimate of pdf
+        :type points:  np.array (# of dimensions, # of points)
+
+        :returns: KDE
+        :rtype: np.array (# of points)
+        """
+        points = np.atleast_2d(points)
+        n_dims, n_points = points.shape
+
+        message = "points dimension, {} != dataset dimension, {}"
+        assert n_dims == self.n_dims, message.format(n_dims, self.n_dims)
+
+        if self._tree is None:
+            self._tree = cKDTree(self._whiten(self.dataset).T)
+
+        points = self._whiten(points).T
+        pdf = np.zeros(n_points)
+
+        # Each pair is two indices and a distance, plus temporaries
+        max_pairs = max(1, self.max_memory // 64)
+        blocks = [np.arange(n_points)]
+
+        while blocks:
+
+            block = blocks.pop()
+            points_tree = cKDTree(points[block])
+
+            n_pairs = points_tree.count_neighbors(self._tree, self.cutoff)
+            if n_pairs > max_pairs and len(block) > 1:
+                blocks.extend(np.array_split(block, 2))
+                continue
+
+            pairs = points_tree.sparse_distance_matrix(self._tree,
+                                                       self.cutoff,
+                                                       output_type='ndarray')
+            kernel = self.weights[pairs['j']] * np.exp(-0.5 * pairs['v']**2)
+            pdf[block] = np.bincount(pairs['i'], weights=kernel, minlength=len(block))
+
+        return self._gauss_norm() * pdf
+
+    def _whiten(self, points):
+        """
+        Transform points about the mean of the dataset such that the
+        chi-squared of the kernel is a squared Euclidean distance.
+
+        :param points: Points to transform
+        :type points:  np.array (# of dimensions, # of points)
+
+        :returns: Whitened points
+        :rtype: np.array (# of dimensions, # of points)
+        """
+        whiten = np.linalg.cholesky(self.inv_cov).T
+        mean = np.mean(self.dataset, axis=1)[:, None]
+        return np.dot(whiten, points - mean)
+
+    def _gauss_norm(self):
+        """
+        :returns: Normalization of Gaussian kernel
+        :rtype: float
+        """
+        return (2. * pi)**(-0.5 * self.n_dims) * self.det_cov**-0.5
+
+    def _cv_factor(self, method):
+        """
+        Select bandwidth by cross-validation on the binned dataset.
+
+        Each candidate costs one FFT. The leave-one-out pdf at a datapoint is
+        approximated by the pdf at its bin, less the kernels of the
+        datapoints in that bin at zero distance. The score is minus the
+        integrated squared error, up to a constant, for 'lscv', or the
+        log-likelihood for 'mlcv'.
+
+        :param method: Cross-validation method, 'lscv' or 'mlcv'
+        :type method: string
+
+        :returns: Bandwidth maximizing cross-validation score. A warning is
+            issued if it is the narrowest or widest candidate, as the best
+            bandwidth may lie beyond them.
+        :rtype: float
+        """
+        candidates = self._scott_factor() * CV_FACTORS
+
+        # Unscaled covariance of the dataset
+        self.bandwidth = 1.
+        self._compute_covariance()
+        unscaled_cov = self.cov
+        sigma = np.diag(unscaled_cov)**0.5
+
+        # Grid resolving the narrowest and padded for the widest kernel
+        grid = self._grid(candidates.min() * sigma, candidates.max() * sigma)
+        bin_vol = np.prod([points[1] - points[0] for points in grid])
+
+        weight = self._bin_dataset(grid)[0] * bin_vol
+        weight_squared = self._bin_dataset(grid, self.weights**2)[0] * bin_vol
+        occupied = weight > 0.
+
+        def score(bandwidth):
+            """ Cross-validation score for a bandwidth. """
+            kernel = self._kernel(grid, unscaled_cov * bandwidth**2)
+            pdf = np.real(fftconvolve(weight, kernel, mode='same')) / bin_vol
+            self_pdf = kernel.max() / bin_vol
+
+            if method == 'lscv':
+                integral_squared = np.sum(pdf**2) * bin_vol
+                leave_one_out = np.sum(weight * pdf) - self_pdf * np.sum(weight_squared)
+                return 2. * leave_one_out - integral_squared
+
+            leave_one_out = (pdf[occupied]
+                             - self_pdf * weight_squared[occupied] / weight[occupied])
+            leave_one_out = np.maximum(leave_one_out, np.finfo(float).tiny)
+            return np.sum(weight[occupied] * np.log(leave_one_out))
+
+        processes = self._threads(len(candidates))
+
+        if processes > 1:
+            pool = ThreadPool(processes)
+            try:
+                scores = pool.map(score, candidates)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            scores = map(score, candidates)
+
+        best = np.argmax(scores)
+        if best in (0, len(candidates) - 1):
+            warnings.warn("{} bandwidth is at the end of the candidates, {} times "
+                          "Scott's rule".format(method, CV_FACTORS[best]))
+
+        return candidates[best]
+
+    def _threads(self, n_tasks):
+        """
+        :param n_tasks: Number of tasks to share between threads
+        :type n_tasks: int
+
+        :returns: Number of threads
+        :rtype: int
+        """
+        processes = self.processes
+        if processes is None:
+            processes = PROCESSES if PROCESSES is not None else cpu_count()
+        return max(1, min(processes, n_tasks))
 
     def _scott_factor(self):
         """
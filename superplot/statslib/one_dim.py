@@ -9,7 +9,7 @@ and calculating the 1D stats for a particular variable.
 from scipy import stats
 from collections import namedtuple
 from kde import gaussian_kde
-from patched_joblib import memory
+from cache import memory
 
 import numpy as np
 import point
@@ -22,6 +22,8 @@ DOCTEST_PRECISION = 10
 _kde_posterior_pdf_1D = namedtuple("_kde_posterior_pdf_1D", ("pdf", "bin_centers"))
 _posterior_pdf_1D = namedtuple("_posterior_pdf_1D", ("pdf", "bin_centers"))
 _prof_data_1D = namedtuple("_prof_data_1D", ("prof_chi_sq", "prof_like", "bin_centers"))
+_credible_regions_1D = namedtuple("_credible_regions_1D", ("median", "lower", "upper"))
+_interval_summary_1D = namedtuple("_interval_summary_1D", ("conf_intervals", "posterior_modes"))
 
 
 @memory.cache
@@ -31,7 +33,8 @@ def kde_posterior_pdf(parameter,
                       bin_limits=None,
                       norm_area=False,
                       bw_method='scott',
-                      fft=True
+                      fft=True,
+                      gridsize=None
                       ):
     r"""
     Kernel density estimate (KDE) of one-dimensional posterior pdf with
@@ -69,6 +72,9 @@ def kde_posterior_pdf(parameter,
     :type bw_method: string or float
     :param fft: Whether to use Fast-Fourier transform
     :type fft: bool
+    :param gridsize: Number of grid points per dimension for Fast-Fourier
+        transform. If None, chosen from band-width.
+    :type gridsize: integer
 
     :returns: KDE of posterior pdf evaluated at centers
     :rtype: named tuple (pdf: numpy.ndarray, bin_centers: numpy.ndarray)
@@ -89,8 +95,9 @@ def kde_posterior_pdf(parameter,
 
     kde_func = gaussian_kde(parameter,
                             weights=posterior,
-                            bw_method=bw_method, 
-                            fft=fft
+                            bw_method=bw_method,
+                            fft=fft,
+                            gridsize=gridsize
                             )
 
     centers = np.linspace(lower, upper, npoints)
@@ -191,32 +198,19 @@ def prof_data(parameter, chi_sq, nbins=50, bin_limits=None):
     >>> assert len(prof.bin_centers) == nbins
     >>> assert len(prof.prof_like) == nbins
     """
-    # Bin the data to find bins, but ignore count itself
-    bin_edges = np.histogram(parameter,
-                             nbins,
-                             range=bin_limits
-                             )[1]
+    # Find bins, without histogramming the data
+    bin_edges = point._bin_edges(parameter, nbins, bin_limits)
+
     # Find centers of bins
     bin_centers = (bin_edges[:-1] + bin_edges[1:]) * 0.5
 
-    # Find bin number for each point in the chain
-    bin_numbers = np.digitize(parameter, bin_edges)
-
-    # Shift bin numbers to account for outliers
-    def shift(_bin_number):
-        return point._shift(_bin_number, nbins)
-
-    bin_numbers = map(shift, bin_numbers)
-
-    # Initialize the profiled chi-squared to something massive
-    prof_chi_sq = np.full(nbins, float("inf"))
+    # Find bin number for each point in the chain, shifted to account for
+    # outliers
+    bin_numbers = point._bin_numbers(parameter, bin_edges)
 
-    # Minimize the chi-squared in each bin by looping over all the entries in
-    # the chain.
-    for index in range(chi_sq.size):
-        bin_number = bin_numbers[index]
-        if chi_sq[index] < prof_chi_sq[bin_number]:
-            prof_chi_sq[bin_number] = chi_sq[index]
+    # Minimize the chi-squared in each bin. Empty bins have infinite
+    # chi-squared.
+    prof_chi_sq = point._grouped_minimum(bin_numbers, chi_sq, nbins)
 
     # Subtract minimum chi-squared (i.e. minimum profile chi-squared is zero,
     # and maximum profile likelihood is one).
@@ -227,7 +221,6 @@ def prof_data(parameter, chi_sq, nbins=50, bin_limits=None):
     return _prof_data_1D(prof_chi_sq, prof_like, bin_centers)
 
 
-@memory.cache
 def _inverse_cdf(prob, pdf, bin_centers):
     r"""
     Inverse of cdf for cdf from posterior pdf, i.e. for probability :math:`p`
@@ -238,53 +231,51 @@ def _inverse_cdf(prob, pdf, bin_centers):
 
     where :math:`F` is the cdf.
 
-    :param prob: Argument of inverse cdf, a probability
-    :type prob: float
+    The cdf is computed once, so many probabilities may be found at once.
+
+    :param prob: Argument of inverse cdf, a probability or probabilities
+    :type prob: float or numpy.ndarray
     :param pdf: Data column of marginalized posterior pdf
     :type pdf: numpy.ndarray
     :param bin_centers: Data column of parameter at bin centers
     :type bin_centers: numpy.ndarray
 
-    :returns: Paramter value
-    :rtype: float
+    :returns: Paramter value or values
+    :rtype: float or numpy.ndarray
     """
+    prob = np.asarray(prob, dtype=float)
+
     # Probabilities should be between 0 and 1
-    assert 0 <= prob <= 1
+    assert np.all((0 <= prob) & (prob <= 1))
 
     # Check whether data is binned. Bin centers should be uniformly spaced -
     # this won't be the case for raw, unbinned data.
-    bin_widths = [b_2 - b_1 for b_1, b_2 in zip(bin_centers, bin_centers[1:])]
-    assert all(abs(width - bin_widths[0]) < 1E-10 for width in bin_widths)
-
-    # Normalize pdf so that area is one
-    pdf = pdf / sum(pdf)
-
-    # Shift all bins forward by 1/2 bin width (i.e. bin edges)
-    bin_edges = [bin_ + 0.5 * bin_widths[0] for bin_ in bin_centers]
+    bin_centers = np.asarray(bin_centers)
+    bin_widths = np.diff(bin_centers)
+    assert np.all(np.abs(bin_widths - bin_widths[0]) < 1E-10)
 
-    # Insert first edge so we have n + 1 edges
-    bin_edges.insert(0, bin_centers[0] - 0.5 * bin_widths[0])
+    # Bin edges, so we have n + 1 edges
+    bin_edges = np.append(bin_centers[0] - 0.5 * bin_widths[0],
+                          bin_centers + 0.5 * bin_widths[0])
 
-    # Build a list of (parameter index, cumulative posterior weight).
-    # Note we insert an initial entry at index zero with cumulative weight
-    # zero to match the first bin edge.
-    cumulative = list(enumerate([0] + list(np.cumsum(pdf))))
-    cdf = zip(*cumulative)[1]
-    assert min(cdf) <= prob <= max(cdf)
+    # Cumulative posterior weight at bin edges, normalized such that area is
+    # one. Note cumulative weight is zero at the first bin edge.
+    pdf = np.asarray(pdf)
+    cdf = np.append(0., np.cumsum(pdf / pdf.sum()))
+    assert np.all((cdf[0] <= prob) & (prob <= cdf[-1]))
 
-    # Find the index of the last param value having
+    # Index of the last param value having
     # cumulative posterior weight <= desired probability
-    index_lower = filter(lambda x: x[1] <= prob, cumulative)[-1][0]
+    index_lower = np.searchsorted(cdf, prob, side='right') - 1
 
-    # Find the index of the first param value having
+    # Index of the first param value having
     # cumulative posterior weight >= desired probability
-    index_upper = filter(lambda x: x[1] >= prob, cumulative)[0][0]
+    index_upper = np.searchsorted(cdf, prob, side='left')
 
     mean = 0.5 * (bin_edges[index_lower] + bin_edges[index_upper])
     return mean
 
 
-@memory.cache
 def credible_region(pdf, bin_centers, alpha, region):
     r"""
     Calculate one-dimensional credible region with symmetric ordering rule i.e.
@@ -365,7 +356,43 @@ def credible_region(pdf, bin_centers, alpha, region):
     return _inverse_cdf(desired_prob, pdf, bin_centers)
 
 
-@memory.cache
+def credible_regions(pdf, bin_centers, alpha):
+    r"""
+    Calculate posterior median and one-dimensional credible regions with
+    symmetric ordering rule for several probability levels at once, from a
+    single cdf.
+
+    See :func:`credible_region` and :func:`posterior_median`.
+
+    :param pdf: Data column of marginalized posterior pdf
+    :type pdf: numpy.ndarray
+    :param bin_centers: Data column of parameter at bin centers
+    :type bin_centers: numpy.ndarray
+    :param alpha: Probability levels
+    :type alpha: list or numpy.ndarray
+
+    :returns: Posterior median and lower and upper edges of credible regions
+        for each probability level
+    :rtype: named tuple (median: float, lower: numpy.ndarray, upper: \
+        numpy.ndarray)
+
+    :Example:
+
+    >>> nbins = 1000
+    >>> alpha = [0.05, 0.32]
+    >>> pdf = posterior_pdf(data[2], data[0], nbins=nbins)
+    >>> regions = credible_regions(pdf.pdf, pdf.bin_centers, alpha)
+    >>> regions.median == posterior_median(pdf.pdf, pdf.bin_centers)
+    True
+    >>> regions.lower[1] == credible_region(pdf.pdf, pdf.bin_centers, alpha[1], "lower")
+    True
+    """
+    alpha = np.atleast_1d(alpha)
+    prob = np.concatenate(([0.5], 0.5 * alpha, 1. - 0.5 * alpha))
+    edges = _inverse_cdf(prob, pdf, bin_centers)
+    return _credible_regions_1D(edges[0], edges[1:len(alpha) + 1], edges[len(alpha) + 1:])
+
+
 def conf_interval(chi_sq, bin_centers, alpha):
     """
     Calculate one dimensional confidence interval with delta-chi-squared.
@@ -406,18 +433,13 @@ def conf_interval(chi_sq, bin_centers, alpha):
 
     # Find regions of binned parameter that have delta chi_sq < critical_value
     delta_chi_sq = chi_sq - chi_sq.min()
-    _conf_interval = np.zeros(chi_sq.size)
-
-    for index in range(delta_chi_sq.size):
-        if delta_chi_sq[index] < critical_chi_sq:
-            _conf_interval[index] = bin_centers[index]
-        else:
-            _conf_interval[index] = None
+    _conf_interval = np.where(delta_chi_sq < critical_chi_sq,
+                              np.asarray(bin_centers, dtype=float),
+                              np.nan)
 
     return _conf_interval
 
 
-@memory.cache
 def posterior_median(pdf, bin_centers):
     r"""
     Calculate the posterior median. The median, :math:`m`, is such that
@@ -463,7 +485,6 @@ def posterior_median(pdf, bin_centers):
     return _inverse_cdf(0.5, pdf, bin_centers)
 
 
-@memory.cache
 def posterior_mode(pdf, bin_centers):
     """
     Calculate the posterior mode for a 1D PDF. The mode is such
@@ -512,19 +533,62 @@ def posterior_mode(pdf, bin_centers):
     >>> round(posterior_mode(kde.pdf, kde.bin_centers)[0], DOCTEST_PRECISION)
     140.3991747766
     """
-    # Find the maximum weighted count.
-    max_count = max(pdf)
-
     # Find the indices of bins having the max count.
-    max_indices = [i for i, j in enumerate(pdf) if j == max_count]
-    assert pdf.argmax() in max_indices
+    max_indices = np.flatnonzero(pdf == pdf.max())
 
     if len(max_indices) > 1:
         warnings.warn("posterior_mode: max count shared by {} bins".format(
             len(max_indices)
         ))
 
-    return [bin_centers[i] for i in max_indices]
+    return list(np.asarray(bin_centers)[max_indices])
+
+
+def interval_summary(pdf, bin_centers, prof_chi_sq, prof_bin_centers, alpha):
+    """
+    Calculate confidence intervals for several probability levels and
+    posterior modes at once.
+
+    See :func:`conf_interval` and :func:`posterior_mode`. The profiled
+    chi-squared is compared with the critical values for every probability
+    level in a single operation.
+
+    :param pdf: Data column of marginalised posterior PDF
+    :type pdf: numpy.ndarray
+    :param bin_centers: Data column of parameter at bin centers of PDF
+    :type bin_centers: numpy.ndarray
+    :param prof_chi_sq: Data column of profiled chi-squared
+    :type prof_chi_sq: numpy.ndarray
+    :param prof_bin_centers: Data column of parameter at bin centers of
+        profiled chi-squared
+    :type prof_bin_centers: numpy.ndarray
+    :param alpha: Probability levels
+    :type alpha: list or numpy.ndarray
+
+    :returns: Confidence interval for each probability level and list of
+        posterior modes
+    :rtype: named tuple (conf_intervals: numpy.ndarray, posterior_modes: list)
+
+    :Example:
+
+    >>> nbins = 70
+    >>> alpha = [0.05, 0.32]
+    >>> pdf = posterior_pdf(data[2], data[0], nbins=nbins)
+    >>> prof = prof_data(data[2], data[1], nbins=nbins)
+    >>> summary = interval_summary(pdf.pdf, pdf.bin_centers, prof.prof_chi_sq, prof.bin_centers, alpha)
+    >>> summary.posterior_modes == posterior_mode(pdf.pdf, pdf.bin_centers)
+    True
+    >>> np.testing.assert_array_equal(summary.conf_intervals[1],
+    ...                               conf_interval(prof.prof_chi_sq, prof.bin_centers, alpha[1]))
+    """
+    critical_chi_sq = stats.chi2.ppf(1. - np.asarray(alpha, dtype=float), 1)
+
+    delta_chi_sq = prof_chi_sq - prof_chi_sq.min()
+    conf_intervals = np.where(delta_chi_sq < critical_chi_sq[:, np.newaxis],
+                              np.asarray(prof_bin_centers, dtype=float),
+                              np.nan)
+
+    return _interval_summary_1D(conf_intervals, posterior_mode(pdf, bin_centers))
 
 
 if __name__ == "__main__":
@@ -7,7 +7,6 @@ This module contains statistical functions that return a single data point.
 
 import numpy as np
 from scipy import stats
-from patched_joblib import memory
 
 DOCTEST_PRECISION = 10
 
@@ -37,7 +36,95 @@ def _shift(bin_number, nbins):
     return bin_number
 
 
-@memory.cache
+def _bin_edges(param, nbins, bin_limits=None):
+    """
+    Find edges of uniformly spaced bins, identical to those from
+    :func:`numpy.histogram`, without histogramming the data.
+
+    :param param: Data column of parameter
+    :type param: numpy.ndarray
+    :param nbins: Total number of bins
+    :type nbins: integer
+    :param bin_limits: Bin limits [min, max], or None for extent of data
+    :type bin_limits: list
+
+    :returns: Edges of bins
+    :rtype: numpy.ndarray
+    """
+    if bin_limits is None:
+        lower, upper = np.min(param), np.max(param)
+    else:
+        lower, upper = bin_limits
+
+    # As in numpy, avoid bins of zero width
+    if lower == upper:
+        lower -= 0.5
+        upper += 0.5
+
+    return np.linspace(lower, upper, nbins + 1)
+
+
+def _bin_numbers(param, bin_edges):
+    """
+    Find bin number of each entry of a parameter, shifted as in
+    :func:`_shift`, such that bin numbers match array indices
+    `[0, nbins - 1]`. Outliers have bin number -1.
+
+    The bin numbers are identical to those from :func:`numpy.digitize`, but,
+    as the bins are uniformly spaced, are found by arithmetic rather than by
+    searching the bin edges.
+
+    :param param: Data column of parameter
+    :type param: numpy.ndarray
+    :param bin_edges: Edges of uniformly spaced bins
+    :type bin_edges: numpy.ndarray
+
+    :returns: Bin numbers
+    :rtype: numpy.ndarray
+    """
+    nbins = len(bin_edges) - 1
+    scale = nbins / (bin_edges[-1] - bin_edges[0])
+
+    # Estimate bin numbers in [-1, nbins], with NaNs in the overflow bin
+    estimate = np.floor((param - bin_edges[0]) * scale)
+    estimate = np.clip(estimate, -1, nbins, out=estimate)
+    estimate[np.isnan(estimate)] = nbins
+    bin_numbers = estimate.astype(int)
+
+    # Correct estimates that rounding put in a neighbouring bin, such that
+    # edges[i] <= param < edges[i + 1], as with numpy.digitize
+    edges = np.concatenate(([-np.inf], bin_edges, [np.inf]))
+    with np.errstate(invalid="ignore"):
+        bin_numbers[param < edges[bin_numbers + 1]] -= 1
+        bin_numbers[param >= edges[bin_numbers + 2]] += 1
+
+    bin_numbers[bin_numbers >= nbins] = -1
+    return bin_numbers
+
+
+def _grouped_minimum(bin_numbers, values, nbins):
+    """
+    Find minimum of values in each bin with an unbuffered vectorized
+    reduction. Outliers, with bin number -1, are ignored.
+
+    :param bin_numbers: Bin number of each value
+    :type bin_numbers: numpy.ndarray
+    :param values: Values, same length as bin numbers
+    :type values: numpy.ndarray
+    :param nbins: Total number of bins
+    :type nbins: integer
+
+    :returns: Minimum value in each bin, or infinity if a bin is empty
+    :rtype: numpy.ndarray
+    """
+    # Outliers, with bin number -1, are reduced into an extra last bin that
+    # is discarded. NaNs are ignored, as they never compare less than
+    # another value.
+    minimum = np.full(nbins + 1, float("inf"))
+    np.fmin.at(minimum, bin_numbers, values)
+    return minimum[:-1]
+
+
 def posterior_mean(posterior, param):
     r"""
     Calculate the posterior mean:
@@ -66,7 +153,6 @@ def posterior_mean(posterior, param):
     return _posterior_mean
 
 
-@memory.cache
 def best_fit(chi_sq, param):
     """
     Calculate the best-fit value of a parameter, i.e. the parameter such that
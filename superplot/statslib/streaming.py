@@ -0,0 +1,474 @@
+"""
+===============================
+Streaming Statistical Functions
+===============================
+This module contains streaming versions of statistical functions, for chains
+that are too large to hold in memory. Rather than data columns, they consume
+an iterable of blocks of rows, e.g. from :func:`superplot.data_loader.iter_chunks`,
+in which each block is a sequence of data columns in the same order as the
+arguments of the corresponding function in :mod:`one_dim`, :mod:`two_dim`
+or :mod:`point`.
+
+The statistics are accumulated by classes with an `update` method, which
+may be called with further blocks of rows at any time, and a `result` method.
+
+.. warning::
+    Unlike the in-memory functions, the bin limits cannot be found from the
+    data as it is read. They must be specified, or found in a separate pass
+    over the chain with :func:`limits`.
+"""
+
+import numpy as np
+
+import one_dim
+import two_dim
+import point
+
+
+class PosteriorPDF1D(object):
+    """
+    Weighted histogram for one-dimensional posterior pdf. See
+    :func:`one_dim.posterior_pdf`.
+
+    :param nbins: Number of bins for histogram
+    :type nbins: integer
+    :param bin_limits: Bin limits for histogram
+    :type bin_limits: list [xmin, xmax]
+    """
+    def __init__(self, nbins, bin_limits):
+        self.bin_edges = _bin_edges(nbins, bin_limits)
+        self.bin_limits = bin_limits
+        self.counts = np.zeros(nbins)
+
+    def update(self, parameter, posterior):
+        """
+        :param parameter: Block of data column of parameter of interest
+        :type parameter: numpy.ndarray
+        :param posterior: Block of data column of posterior weight
+        :type posterior: numpy.ndarray
+        """
+        self.counts += np.histogram(parameter,
+                                    len(self.counts),
+                                    range=self.bin_limits,
+                                    weights=posterior)[0]
+
+    def result(self, norm_area=False):
+        """
+        :param norm_area: If True, normalize the pdf so that the integral over
+            the range is one. Otherwise, normalize the pdf so that the maximum
+            value is one.
+        :type norm_area: bool
+
+        :returns: Posterior pdf and centers of bins for probability distribution
+        :rtype: named tuple (pdf: numpy.ndarray, bin_centers: numpy.ndarray)
+        """
+        if norm_area:
+            pdf = self.counts / (self.counts.sum() * np.diff(self.bin_edges))
+        else:
+            pdf = self.counts / self.counts.max()
+
+        return one_dim._posterior_pdf_1D(pdf, _bin_centers(self.bin_edges))
+
+
+class ProfData1D(object):
+    """
+    Minimum chi-squared in each bin for one-dimensional profile likelihood. See
+    :func:`one_dim.prof_data`.
+
+    :param nbins: Number of bins for histogram
+    :type nbins: integer
+    :param bin_limits: Bin limits for histogram
+    :type bin_limits: list [xmin, xmax]
+    """
+    def __init__(self, nbins, bin_limits):
+        self.bin_edges = _bin_edges(nbins, bin_limits)
+        self.chi_sq = np.full(nbins, float("inf"))
+
+    def update(self, parameter, chi_sq):
+        """
+        :param parameter: Block of data column of parameter of interest
+        :type parameter: numpy.ndarray
+        :param chi_sq: Block of data column of chi-squared
+        :type chi_sq: numpy.ndarray
+        """
+        bin_numbers = point._bin_numbers(parameter, self.bin_edges)
+        block_chi_sq = point._grouped_minimum(bin_numbers, chi_sq, self.chi_sq.size)
+        np.minimum(self.chi_sq, block_chi_sq, out=self.chi_sq)
+
+    def result(self):
+        """
+        :returns: Profile chi squared, profile likelihood, and bin centers.
+        :rtype: named tuple (prof_chi_sq: numpy.ndarray, prof_like: numpy.ndarray, \
+                bin_centers: numpy.ndarray)
+        """
+        prof_chi_sq = self.chi_sq - self.chi_sq.min()
+        prof_like = np.exp(- 0.5 * prof_chi_sq)
+        return one_dim._prof_data_1D(prof_chi_sq, prof_like, _bin_centers(self.bin_edges))
+
+
+class PosteriorPDF2D(object):
+    """
+    Weighted histogram for two-dimensional posterior pdf. See
+    :func:`two_dim.posterior_pdf`.
+
+    :param nbins: Number of bins for histogram per dimension
+    :type nbins: integer
+    :param bin_limits: Bin limits for histogram
+    :type bin_limits: list [[xmin,xmax],[ymin,ymax]]
+    """
+    def __init__(self, nbins, bin_limits):
+        self.bin_edges_x = _bin_edges(nbins, bin_limits[0])
+        self.bin_edges_y = _bin_edges(nbins, bin_limits[1])
+        self.bin_limits = bin_limits
+        self.counts = np.zeros((nbins, nbins))
+
+    def update(self, paramx, paramy, posterior):
+        """
+        :param paramx: Block of data column of parameter x
+        :type paramx: numpy.ndarray
+        :param paramy: Block of data column of parameter y
+        :type paramy: numpy.ndarray
+        :param posterior: Block of data column of posterior weight
+        :type posterior: numpy.ndarray
+        """
+        self.counts += np.histogram2d(paramx,
+                                      paramy,
+                                      len(self.counts),
+                                      range=self.bin_limits,
+                                      weights=posterior)[0]
+
+    def result(self):
+        """
+        :returns: Posterior pdf, x and y bin centers
+        :rtype: named tuple (pdf: numpy.ndarray, bin_centers_x: \
+            numpy.ndarray, bin_centers_y: numpy.ndarray)
+        """
+        return two_dim._posterior_pdf_2D(self.counts / self.counts.max(),
+                                         _bin_centers(self.bin_edges_x),
+                                         _bin_centers(self.bin_edges_y))
+
+
+class ProfileLike2D(object):
+    """
+    Minimum chi-squared in each bin for two-dimensional profile likelihood. See
+    :func:`two_dim.profile_like`.
+
+    :param nbins: Number of bins for histogram per dimension
+    :type nbins: integer
+    :param bin_limits: Bin limits for histogram
+    :type bin_limits: list [[xmin,xmax],[ymin,ymax]]
+    """
+    def __init__(self, nbins, bin_limits):
+        self.bin_edges_x = _bin_edges(nbins, bin_limits[0])
+        self.bin_edges_y = _bin_edges(nbins, bin_limits[1])
+        self.chi_sq = np.full((nbins, nbins), float("inf"))
+
+    def update(self, paramx, paramy, chi_sq):
+        """
+        :param paramx: Block of data column of parameter x
+        :type paramx: numpy.ndarray
+        :param paramy: Block of data column of parameter y
+        :type paramy: numpy.ndarray
+        :param chi_sq: Block of data column of chi-squared
+        :type chi_sq: numpy.ndarray
+        """
+        nbins = len(self.chi_sq)
+        bin_numbers = two_dim._flat_bin_numbers(paramx,
+                                                paramy,
+                                                self.bin_edges_x,
+                                                self.bin_edges_y)
+        block_chi_sq = point._grouped_minimum(bin_numbers, chi_sq, nbins**2)
+        np.minimum(self.chi_sq, block_chi_sq.reshape(nbins, nbins), out=self.chi_sq)
+
+    def result(self):
+        """
+        :returns: Profile chi squared, profile likelihood, x and y bin centers
+        :rtype: named tuple (\
+            profchi_sq: numpy.ndarray, \
+            prof_like: numpy.ndarray, \
+            bin_center_x: numpy.ndarray, \
+            bin_center_y: numpy.ndarray)
+        """
+        prof_chi_sq = self.chi_sq - self.chi_sq.min()
+        prof_like = np.exp(- 0.5 * prof_chi_sq)
+        return two_dim._profile_data_2D(prof_chi_sq,
+                                        prof_like,
+                                        _bin_centers(self.bin_edges_x),
+                                        _bin_centers(self.bin_edges_y))
+
+
+class BestFit(object):
+    """
+    Best-fit value of a parameter. See :func:`point.best_fit`.
+    """
+    def __init__(self):
+        self.chi_sq = float("inf")
+        self.best_fit = None
+
+    def update(self, chi_sq, param):
+        """
+        :param chi_sq: Block of data column of chi-squared
+        :type chi_sq: numpy.ndarray
+        :param param: Block of data column of parameter of interest
+        :type param: numpy.ndarray
+        """
+        if not chi_sq.size:
+            return
+
+        index = chi_sq.argmin()
+
+        # Strict inequality, so that the first of equal minima is kept
+        if chi_sq[index] < self.chi_sq:
+            self.chi_sq = chi_sq[index]
+            self.best_fit = param[index]
+
+    def result(self):
+        """
+        :returns: The best-fit value of a parameter
+        :rtype: numpy.float64
+        """
+        return self.best_fit
+
+
+class PosteriorMean(object):
+    """
+    Posterior mean of a parameter. See :func:`point.posterior_mean`.
+    """
+    def __init__(self):
+        self.weighted_sum = 0.
+        self.sum_weights = 0.
+
+    def update(self, posterior, param):
+        """
+        :param posterior: Block of data column of posterior weight
+        :type posterior: numpy.ndarray
+        :param param: Block of data column of parameter of interest
+        :type param: numpy.ndarray
+        """
+        self.weighted_sum += np.dot(posterior, param)
+        self.sum_weights += posterior.sum()
+
+    def result(self):
+        """
+        :returns: Posterior mean
+        :rtype: numpy.float64
+        """
+        return self.weighted_sum / self.sum_weights
+
+
+def _bin_edges(nbins, bin_limits):
+    """
+    :param nbins: Number of bins
+    :type nbins: integer
+    :param bin_limits: Bin limits [min, max]
+    :type bin_limits: list
+
+    :returns: Edges of bins, identical to those from :func:`numpy.histogram`
+    :rtype: numpy.ndarray
+    """
+    if bin_limits is None:
+        raise ValueError("Streaming statistics require bin limits")
+    return point._bin_edges(None, nbins, bin_limits)
+
+
+def _bin_centers(bin_edges):
+    """
+    :param bin_edges: Edges of bins
+    :type bin_edges: numpy.ndarray
+
+    :returns: Centers of bins
+    :rtype: numpy.ndarray
+    """
+    return (bin_edges[:-1] + bin_edges[1:]) * 0.5
+
+
+def _consume(statistic, blocks):
+    """
+    Update a statistic with every block of rows.
+
+    :param statistic: Statistic with an `update` method
+    :type statistic: object
+    :param blocks: Blocks of rows, each a sequence of data columns
+    :type blocks: iterable
+
+    :returns: Updated statistic
+    :rtype: object
+    """
+    for block in blocks:
+        statistic.update(*block)
+    return statistic
+
+
+def limits(blocks):
+    """
+    Find minimum and maximum of every data column, e.g. to use as bin limits.
+
+    :param blocks: Blocks of rows, each a sequence of data columns
+    :type blocks: iterable
+
+    :returns: Minimum and maximum of each data column
+    :rtype: list [[min, max], ...]
+
+    :Example:
+
+    >>> limits(data_loader.iter_chunks(GAUSS, chunk_size=1000, columns=[2, 3])) == [
+    ...     [data[2].min(), data[2].max()], [data[3].min(), data[3].max()]]
+    True
+    """
+    lower = upper = None
+
+    for block in blocks:
+        block_lower = [np.min(column) for column in block]
+        block_upper = [np.max(column) for column in block]
+        if lower is None:
+            lower, upper = block_lower, block_upper
+        else:
+            lower = np.minimum(lower, block_lower)
+            upper = np.maximum(upper, block_upper)
+
+    return [[min_, max_] for min_, max_ in zip(lower, upper)]
+
+
+def posterior_pdf_1D(blocks, nbins=50, bin_limits=None, norm_area=False):
+    """
+    Streaming version of :func:`one_dim.posterior_pdf`.
+
+    :param blocks: Blocks of rows, each (parameter, posterior)
+    :type blocks: iterable
+
+    :returns: Posterior pdf and centers of bins for probability distribution
+    :rtype: named tuple (pdf: numpy.ndarray, bin_centers: numpy.ndarray)
+
+    :Example:
+
+    >>> nbins = 100
+    >>> bin_limits = [data[2].min(), data[2].max()]
+    >>> blocks = data_loader.iter_chunks(GAUSS, chunk_size=1000, columns=[2, 0])
+    >>> pdf = posterior_pdf_1D(blocks, nbins=nbins, bin_limits=bin_limits)
+    >>> expected = one_dim.posterior_pdf(data[2], data[0], nbins=nbins, bin_limits=bin_limits)
+    >>> np.testing.assert_allclose(pdf.pdf, expected.pdf)
+    >>> np.testing.assert_allclose(pdf.bin_centers, expected.bin_centers)
+    """
+    return _consume(PosteriorPDF1D(nbins, bin_limits), blocks).result(norm_area)
+
+
+def prof_data_1D(blocks, nbins=50, bin_limits=None):
+    """
+    Streaming version of :func:`one_dim.prof_data`.
+
+    :param blocks: Blocks of rows, each (parameter, chi_sq)
+    :type blocks: iterable
+
+    :returns: Profile chi squared, profile likelihood, and bin centers.
+    :rtype: named tuple (prof_chi_sq: numpy.ndarray, prof_like: numpy.ndarray, \
+            bin_centers: numpy.ndarray)
+
+    :Example:
+
+    >>> nbins = 100
+    >>> bin_limits = [data[2].min(), data[2].max()]
+    >>> blocks = data_loader.iter_chunks(GAUSS, chunk_size=1000, columns=[2, 1])
+    >>> prof = prof_data_1D(blocks, nbins=nbins, bin_limits=bin_limits)
+    >>> expected = one_dim.prof_data(data[2], data[1], nbins=nbins, bin_limits=bin_limits)
+    >>> np.testing.assert_array_equal(prof.prof_chi_sq, expected.prof_chi_sq)
+    >>> np.testing.assert_allclose(prof.bin_centers, expected.bin_centers)
+    """
+    return _consume(ProfData1D(nbins, bin_limits), blocks).result()
+
+
+def posterior_pdf_2D(blocks, nbins=50, bin_limits=None):
+    """
+    Streaming version of :func:`two_dim.posterior_pdf`.
+
+    :param blocks: Blocks of rows, each (paramx, paramy, posterior)
+    :type blocks: iterable
+
+    :returns: Posterior pdf, x and y bin centers
+    :rtype: named tuple (pdf: numpy.ndarray, bin_centers_x: \
+        numpy.ndarray, bin_centers_y: numpy.ndarray)
+
+    :Example:
+
+    >>> nbins = 100
+    >>> bin_limits = [[data[2].min(), data[2].max()], [data[3].min(), data[3].max()]]
+    >>> blocks = data_loader.iter_chunks(GAUSS, chunk_size=1000, columns=[2, 3, 0])
+    >>> pdf = posterior_pdf_2D(blocks, nbins=nbins, bin_limits=bin_limits)
+    >>> expected = two_dim.posterior_pdf(data[2], data[3], data[0], nbins=nbins, bin_limits=bin_limits)
+    >>> np.testing.assert_allclose(pdf.pdf, expected.pdf)
+    """
+    return _consume(PosteriorPDF2D(nbins, bin_limits), blocks).result()
+
+
+def profile_like_2D(blocks, nbins=50, bin_limits=None):
+    """
+    Streaming version of :func:`two_dim.profile_like`.
+
+    :param blocks: Blocks of rows, each (paramx, paramy, chi_sq)
+    :type blocks: iterable
+
+    :returns: Profile chi squared, profile likelihood, x and y bin centers
+    :rtype: named tuple (\
+        profchi_sq: numpy.ndarray, \
+        prof_like: numpy.ndarray, \
+        bin_center_x: numpy.ndarray, \
+        bin_center_y: numpy.ndarray)
+
+    :Example:
+
+    >>> nbins = 100
+    >>> bin_limits = [[data[2].min(), data[2].max()], [data[3].min(), data[3].max()]]
+    >>> blocks = data_loader.iter_chunks(GAUSS, chunk_size=1000, columns=[2, 3, 1])
+    >>> prof = profile_like_2D(blocks, nbins=nbins, bin_limits=bin_limits)
+    >>> expected = two_dim.profile_like(data[2], data[3], data[1], nbins=nbins, bin_limits=bin_limits)
+    >>> np.testing.assert_array_equal(prof.prof_chi_sq, expected.prof_chi_sq)
+    """
+    return _consume(ProfileLike2D(nbins, bin_limits), blocks).result()
+
+
+def best_fit(blocks):
+    """
+    Streaming version of :func:`point.best_fit`.
+
+    :param blocks: Blocks of rows, each (chi_sq, param)
+    :type blocks: iterable
+
+    :returns: The best-fit value of a parameter
+    :rtype: numpy.float64
+
+    :Example:
+
+    >>> blocks = data_loader.iter_chunks(GAUSS, chunk_size=1000, columns=[1, 2])
+    >>> best_fit(blocks) == point.best_fit(data[1], data[2])
+    True
+    """
+    return _consume(BestFit(), blocks).result()
+
+
+def posterior_mean(blocks):
+    """
+    Streaming version of :func:`point.posterior_mean`.
+
+    :param blocks: Blocks of rows, each (posterior, param)
+    :type blocks: iterable
+
+    :returns: Posterior mean
+    :rtype: numpy.float64
+
+    :Example:
+
+    >>> blocks = data_loader.iter_chunks(GAUSS, chunk_size=1000, columns=[0, 2])
+    >>> np.isclose(posterior_mean(blocks), point.posterior_mean(data[0], data[2]))
+    True
+    """
+    return _consume(PosteriorMean(), blocks).result()
+
+
+if __name__ == "__main__":
+
+    import doctest
+    import superplot.data_loader as data_loader
+
+    GAUSS = "../example/gaussian_.txt"
+    GAUSS_DATA = data_loader.load(None, GAUSS)[1]
+
+    doctest.testmod(extraglobs={'data': GAUSS_DATA})
@@ -7,10 +7,8 @@ and calculating the 2D stats for a particular pair of variables.
 """
 
 from collections import namedtuple
-from scipy.optimize import bisect
-from numpy import ma
 from kde import gaussian_kde
-from patched_joblib import memory
+from cache import memory
 
 import point
 import numpy as np
@@ -39,7 +37,8 @@ def kde_posterior_pdf(paramx,
                       npoints=100,
                       bin_limits=None,
                       bw_method='scott',
-                      fft=True):
+                      fft=True,
+                      gridsize=None):
     r"""
     Kenerl density estimate (KDE) of two-dimensional posterior pdf with
     Gaussian kernel.
@@ -75,6 +74,9 @@ def kde_posterior_pdf(paramx,
     :type bw_method: string or float
     :param fft: Whether to use Fast-Fourier transform
     :type fft: bool
+    :param gridsize: Number of grid points per dimension for Fast-Fourier
+        transform. If None, chosen from band-width.
+    :type gridsize: integer
 
     :returns: KDE of posterior pdf at x and y centers
     :rtype: named tuple (pdf: numpy.ndarray, bin_centers_x: \
@@ -102,14 +104,13 @@ def kde_posterior_pdf(paramx,
     kde_func = gaussian_kde(np.array((paramx, paramy)),
                             weights=posterior,
                             bw_method=bw_method,
-                            fft=fft
+                            fft=fft,
+                            gridsize=gridsize
                             )
 
     centers_x = np.linspace(lower_x, upper_x, npoints)
     centers_y = np.linspace(lower_y, upper_y, npoints)
-    points = np.array([[x, y] for x in centers_x for y in centers_y]).T
-    kde = kde_func(points)
-    kde = np.reshape(kde, (npoints, npoints))
+    kde = kde_func.grid(centers_x, centers_y)
 
     # Normalize the pdf so that its maximum value is one. NB in other functions,
     # normalize such that area is one.
@@ -205,37 +206,25 @@ def profile_like(paramx, paramy, chi_sq, nbins, bin_limits=None):
     >>> assert len(x) == nbins
     >>> assert len(y) == nbins
     """
-    # Bin the data to find bin edges. nbins we discard the count
-    _, bin_edges_x, bin_edges_y = np.histogram2d(
-                                    paramx,
-                                    paramy,
-                                    nbins,
-                                    range=bin_limits,
-                                    weights=None)
+    # Find bin edges, without histogramming the data
+    if bin_limits is None:
+        bin_limits = [None, None]
+    bin_edges_x = point._bin_edges(paramx, nbins, bin_limits[0])
+    bin_edges_y = point._bin_edges(paramy, nbins, bin_limits[1])
 
     # Find centers of bins
     bin_center_x = 0.5 * (bin_edges_x[:-1] + bin_edges_x[1:])
     bin_center_y = 0.5 * (bin_edges_y[:-1] + bin_edges_y[1:])
 
-    # Find bin number for each point in the chain
-    bin_numbers_x = np.digitize(paramx, bin_edges_x)
-    bin_numbers_y = np.digitize(paramy, bin_edges_y)
+    # Find flattened bin number for each point in the chain, shifted to
+    # account for outliers
+    bin_numbers = _flat_bin_numbers(paramx, paramy, bin_edges_x, bin_edges_y)
 
-    # Shift bin numbers to account for outliers
-    def shift(bin_number_):
-        return point._shift(bin_number_, nbins)
-    bin_numbers_x = map(shift, bin_numbers_x)
-    bin_numbers_y = map(shift, bin_numbers_y)
-
-    # Initialize the profiled chi-squared to something massive
-    prof_chi_sq = np.full((nbins, nbins), float("inf"))
-
-    # Minimize the chi-squared in each bin by looping over all the entries in
-    # the chain.
-    for index in range(chi_sq.size):
-        bin_numbers = (bin_numbers_x[index], bin_numbers_y[index])
-        if bin_numbers[0] is not None and bin_numbers[1] is not None and chi_sq[index] < prof_chi_sq[bin_numbers]:
-            prof_chi_sq[bin_numbers] = chi_sq[index]
+    # Minimize the chi-squared in each bin. Empty bins have infinite
+    # chi-squared.
+    shape = (bin_center_x.size, bin_center_y.size)
+    prof_chi_sq = point._grouped_minimum(bin_numbers, chi_sq, shape[0] * shape[1])
+    prof_chi_sq = prof_chi_sq.reshape(shape)
 
     # Subtract minimum chi-squared (i.e. minimum profile chi-squared is zero,
     # and maximum profile likelihood is one).
@@ -247,7 +236,34 @@ def profile_like(paramx, paramy, chi_sq, nbins, bin_limits=None):
     return _profile_data_2D(prof_chi_sq, prof_like, bin_center_x, bin_center_y)
 
 
-@memory.cache
+def _flat_bin_numbers(paramx, paramy, bin_edges_x, bin_edges_y):
+    """
+    Find flattened index of the two-dimensional bin of each entry, i.e. of the
+    bin in a `(nbins_x, nbins_y)` array raveled in C order. Outliers in
+    either dimension have bin number -1.
+
+    :param paramx: Data column of parameter x
+    :type paramx: numpy.ndarray
+    :param paramy: Data column of parameter y
+    :type paramy: numpy.ndarray
+    :param bin_edges_x: Edges of bins for parameter x
+    :type bin_edges_x: numpy.ndarray
+    :param bin_edges_y: Edges of bins for parameter y
+    :type bin_edges_y: numpy.ndarray
+
+    :returns: Flattened bin numbers
+    :rtype: numpy.ndarray
+    """
+    nbins_y = len(bin_edges_y) - 1
+    bin_numbers_x = point._bin_numbers(paramx, bin_edges_x)
+    bin_numbers_y = point._bin_numbers(paramy, bin_edges_y)
+
+    bin_numbers = bin_numbers_x * nbins_y + bin_numbers_y
+    bin_numbers[(bin_numbers_x < 0) | (bin_numbers_y < 0)] = -1
+
+    return bin_numbers
+
+
 def critical_density(pdf, alpha):
     r"""
     Calculate "critical density" from marginalised pdf.
@@ -297,32 +313,49 @@ def critical_density(pdf, alpha):
     >>> round(critical_density(kde, alpha), DOCTEST_PRECISION)
     0.0008117912
     """
-    # Normalize posterior pdf so that integral is one, if it wasn't already
-    pdf = pdf / pdf.sum()
+    return critical_densities(pdf, [alpha])[0]
 
-    # Minimize difference between amount of probability contained above a
-    # particular density and that desired
-    prob_desired = 1. - alpha
 
-    def prob_contained(density):
-        return ma.masked_where(pdf < density, pdf).sum()
+def critical_densities(pdf, alpha):
+    r"""
+    Calculate critical densities from marginalised pdf for several
+    probability levels at once.
 
-    def delta_prob(density):
-        return prob_contained(density) - prob_desired
+    See :func:`critical_density`. The pdf is sorted once in descending order;
+    the probability contained above each density is then its cumulative sum.
+    The critical density for :math:`\alpha` is the smallest density for which
+    the probability contained is at least :math:`1 - \alpha`.
 
-    # Critical density cannot be greater than maximum posterior pdf and must
-    # be greater than 0. The function delta_probability is monotonic on that
-    # interval. Find critical density by bisection.
-    try:
-        _critical_density = bisect(delta_prob, 0., pdf.max())
-    except Exception as error:
-        warnings.warn("Cannot bisect posterior pdf for critical density")
-        raise error
+    :param pdf: Marginalised two-dimensional posterior pdf
+    :type pdf: numpy.ndarray
+    :param alpha: Credible regions contain :math:`1 - \alpha` of probability
+    :type alpha: list or numpy.ndarray
 
-    return _critical_density
+    :returns: Critical density for each probability alpha
+    :rtype: numpy.ndarray
+
+    :Example:
+
+    >>> alpha = [0.05, 0.32]
+    >>> pdf = posterior_pdf(data[2], data[3], data[0], nbins=100)[0]
+    >>> critical_densities(pdf, alpha)[1] == critical_density(pdf, alpha[1])
+    True
+    """
+    # Normalize posterior pdf so that integral is one, if it wasn't already
+    pdf = np.ravel(pdf) / pdf.sum()
+
+    sorted_pdf = np.sort(pdf)[::-1]
+    prob_contained = np.cumsum(sorted_pdf)
+
+    # Index of first density containing desired probability. Guard against
+    # rounding in the cumulative sum for alpha close to zero.
+    prob_desired = 1. - np.asarray(alpha, dtype=float)
+    index = np.searchsorted(prob_contained, prob_desired, side='left')
+    index = np.minimum(index, sorted_pdf.size - 1)
+
+    return sorted_pdf[index]
 
 
-@memory.cache
 def critical_prof_like(alpha):
     r"""
     Use confidence levels to calculate :math:`\Delta \mathcal{L}`.
@@ -350,7 +383,6 @@ def critical_prof_like(alpha):
     return alpha
 
 
-@memory.cache
 def posterior_mode(pdf, bin_centers_x, bin_centers_y):
     """
     Find mode of posterior pdf. This function should normally return a list with
@@ -48,14 +48,11 @@ def _summary(name, param, posterior, chi_sq):
                                      bin_limits=default("bin_limits")
                                      )
 
-    lower_credible_region = one_dim.credible_region(pdf_data.pdf,
-                                                    pdf_data.bin_centers,
-                                                    alpha=default("alpha")[1],
-                                                    region="lower")
-    upper_credible_region = one_dim.credible_region(pdf_data.pdf,
-                                                    pdf_data.bin_centers,
-                                                    alpha=default("alpha")[1],
-                                                    region="upper")
+    credible_regions = one_dim.credible_regions(pdf_data.pdf,
+                                                pdf_data.bin_centers,
+                                                alpha=default("alpha")[1])
+    lower_credible_region = credible_regions.lower[0]
+    upper_credible_region = credible_regions.upper[0]
 
     summary = [name,
                bestfit,
@@ -126,7 +123,8 @@ def main():
 
     parser.add_argument('--data_file',
                         '-d',
-                        help='Chain file to summarise',
+                        help='Chain file(s) or glob pattern to summarise, concatenated into one chain',
+                        nargs='+',
                         type=str,
                         required=True)
     parser.add_argument('--info_file',
@@ -138,16 +136,21 @@ def main():
 
     args = vars(parser.parse_args())
 
-    datafile = os.path.abspath(args['data_file'])
+    datafile = [os.path.abspath(name) for name in args['data_file']]
+    if len(datafile) == 1:
+        datafile = datafile[0]
 
     infofile = args['info_file']
     if infofile:
         infofile = os.path.abspath(infofile)
 
-    # Load and label data
-    labels, data = data_loader.load(infofile, datafile)
+    # Load and label data. Memory-map the data, such that only the columns
+    # that are summarized are read from disk.
+    labels, data = data_loader.load(infofile, datafile, mmap=True)
 
-    summary_table = _summary_table(labels, data, datafile=datafile, infofile=infofile)
+    summary_table = _summary_table(labels, data,
+                                   datafile=", ".join(data_loader.data_file_names(datafile)),
+                                   infofile=infofile)
     return summary_table
 
 
@@ -0,0 +1,425 @@
+"""
+===========
+super_batch
+===========
+
+Command-line interface for making and saving many plots of a chain at once.
+The chain is loaded once, and plots are made in a pool of processes with the
+non-interactive Agg backend. Example usage:
+
+One-dimensional plots of the 3rd and 4th variables, and a two-dimensional plot
+of the pair:
+
+    python super_batch.py ./example/SB_MO_log_allpost.txt --plots 2 3 2,3
+
+Corner plots, i.e. one-dimensional plots of every variable and two-dimensional
+plots of every pair of variables, with an information file:
+
+    python super_batch.py ./example/SB_MO_log_allpost.txt --corner --info_file=./example/SB_MO_log_all.info
+
+The plots for each variable or pair of variables are made by the same process
+and share their statistics. Several types of plot may be made for each, e.g.
+
+    python super_batch.py ./example/SB_MO_log_allpost.txt --corner --two_dim 'Two-dimensional posterior pdf.' 'Two-dimensional profile likelihood.'
+
+Plots with three indices, e.g. `2,3,4`, are three-dimensional scatter plots.
+All plot_options options other than indices and labels are available as
+command-line arguments, and apply to every plot.
+
+The chain is read from its binary cache, see :py:mod:`data_loader`, which is
+memory-mapped. It is shared by the processes with :py:mod:`shared_chain`,
+rather than copied to each of them.
+"""
+
+import os
+import itertools
+import multiprocessing
+from argparse import ArgumentParser as arg_parser
+from os.path import basename, splitext
+from timeit import default_timer as timer
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from superplot.plot_options import plot_options, default
+from superplot.plotlib.context import AnalysisContext
+from superplot.super_command import (PLOT_CLASS, ONE_DIM_PLOT, TWO_DIM_PLOT,
+                                     THREE_DIM_PLOT, guess_type)
+import superplot.data_loader as data_loader
+from superplot.statslib import kde
+from superplot.statslib.cache import memory
+from superplot.shared_chain import SharedChain, attach
+
+
+PER_PLOT = ['xindex', 'yindex', 'zindex', 'xlabel', 'ylabel', 'zlabel']
+ATTRIBUTES = [attr for attr in vars(plot_options)
+              if not attr.startswith('_') and attr not in PER_PLOT]
+
+
+# Chain of this process, which in a worker process is attached to the chain
+# shared by the main process
+_DATA = None
+
+
+def _parse_plot(plot):
+    """
+    :param plot: Comma-separated indices of plot, e.g. `"2,3"`
+    :type plot: str
+
+    :returns: Indices of plot
+    :rtype: tuple
+    """
+    indices = tuple(int(index) for index in plot.split(','))
+    if not 1 <= len(indices) <= 3 or min(indices) < 2:
+        raise ValueError("Plot must have one to three indices >= 2, not {}".format(plot))
+    return indices
+
+
+def corner_plots(indices):
+    """
+    :param indices: Indices of variables
+    :type indices: list
+
+    :returns: Indices of one-dimensional plots of every variable and
+        two-dimensional plots of every pair of variables
+    :rtype: list
+    """
+    return [(index,) for index in indices] + list(itertools.combinations(indices, 2))
+
+
+def _plot_tasks(plots, labels, options, one_dim, two_dim, prefix, output_dir, file_format):
+    """
+    :param plots: Indices of plots
+    :type plots: list
+    :param labels: Labels of variables from \\*.info file
+    :type labels: dict
+    :param options: plot_options style arguments, without indices
+    :type options: namedtuple
+    :param one_dim: Types of one-dimensional plot
+    :type one_dim: list
+    :param two_dim: Types of two-dimensional plot
+    :type two_dim: list
+    :param prefix: Prefix of names of output files
+    :type prefix: str
+    :param output_dir: Directory for output files
+    :type output_dir: str
+    :param file_format: Format of output files, e.g. `"pdf"`
+    :type file_format: str
+
+    :returns: Type, options and name of output file of every plot, grouped by
+        indices of plot
+    :rtype: list
+    """
+    descriptions = {1: one_dim, 2: two_dim, 3: [THREE_DIM_PLOT]}
+    tasks = []
+
+    for indices in plots:
+
+        indexes = dict(zip(['xindex', 'yindex', 'zindex'], indices))
+        plot_opt = options._replace(**indexes)
+
+        # Fix labels with info file
+        for axis, index in zip("xyz", indices):
+            if getattr(plot_opt, axis + 'label') is None and index in labels:
+                plot_opt = plot_opt._replace(**{axis + 'label': labels[index]})
+
+        group = []
+        for description in descriptions[len(indices)]:
+            name = "{}_{}_{}.{}".format(prefix,
+                                        '_'.join(str(index) for index in indices),
+                                        PLOT_CLASS[description].__name__,
+                                        file_format)
+            group.append((description, plot_opt, os.path.join(output_dir, name)))
+
+        tasks.append(group)
+
+    return tasks
+
+
+def _attach(handle=None, data=None, threads=None):
+    """
+    Set the chain of this process.
+
+    :param handle: Handle of chain shared by main process
+    :type handle: :py:data:`shared_chain.handle`
+    :param data: Data chain, if not shared
+    :type data: numpy.ndarray or dict
+    :param threads: Number of threads per KDE in this process, or None for
+        the number of CPUs
+    :type threads: integer
+    """
+    global _DATA
+    if handle is not None:
+        _, data = attach(handle)
+    _DATA = data
+    kde.PROCESSES = threads
+
+
+def _make_plots(group):
+    """
+    Make and save plots of the same indices, sharing their statistics.
+
+    :param group: Type, options and name of output file of each plot
+    :type group: list
+
+    :returns: Name of output file and summary of each plot, and statistics
+        of the cache of statistics whilst making them
+    :rtype: list, dict
+    """
+    context = AnalysisContext(_DATA)
+    results = []
+    before = memory.statistics()
+
+    for description, options, output_file in group:
+        figure = PLOT_CLASS[description](_DATA, options, context=context).figure()
+        figure.figure.savefig(output_file)
+        plt.close(figure.figure)
+        results.append((output_file, figure.summary))
+
+    statistics = dict()
+    for name, counters in memory.statistics().iteritems():
+        initial = before.get(name, dict())
+        statistics[name] = {counter: value - initial.get(counter, 0)
+                            for counter, value in counters.iteritems()}
+
+    return results, statistics
+
+
+def save_plots(txt_file, info_file, plots, options, one_dim=None, two_dim=None,
+               output_dir=".", file_format="pdf", processes=None):
+    """
+    Load a chain once and make and save many plots of it in a pool of
+    processes.
+
+    :param txt_file: Name of \\*.txt file, list of names or glob pattern
+    :type txt_file: str or list
+    :param info_file: Name of \\*.info file
+    :type info_file: str
+    :param plots: Indices of plots, e.g. `[(2,), (2, 3)]`, or None for
+        corner plots of every variable
+    :type plots: list
+    :param options: plot_options style arguments, without indices
+    :type options: namedtuple
+    :param one_dim: Types of one-dimensional plot
+    :type one_dim: list
+    :param two_dim: Types of two-dimensional plot
+    :type two_dim: list
+    :param output_dir: Directory for output files
+    :type output_dir: str
+    :param file_format: Format of output files, e.g. `"pdf"`
+    :type file_format: str
+    :param processes: Number of processes, or None for the number of CPUs
+    :type processes: integer
+
+    The statistics of the cache of statistics in worker processes are added
+    to those of this process, such that :meth:`PersistentCache.report`
+    covers every plot.
+
+    :returns: Name of output file and summary of each plot
+    :rtype: list
+    """
+    one_dim = one_dim or [ONE_DIM_PLOT]
+    two_dim = two_dim or [TWO_DIM_PLOT]
+    for description in one_dim + two_dim:
+        assert description in PLOT_CLASS.keys(), 'Unknown plot_description = {}'.format(description)
+
+    # Fetch data. Load only the columns that are plotted, memory-mapped if
+    # the chain was previously cached.
+
+    if plots is None:
+        columns = None
+    else:
+        columns = sorted(set([0, 1]).union(*plots))
+
+    labels, data = data_loader.load(info_file, txt_file, mmap=True, columns=columns)
+
+    if plots is None:
+        plots = corner_plots(range(2, len(data)))
+
+    name = basename(data_loader.data_file_names(txt_file)[0])
+    prefix = splitext(name)[0]
+
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    # Fix labels with info file only
+    if not info_file:
+        labels = dict()
+
+    tasks = _plot_tasks(plots, labels, options, one_dim, two_dim, prefix, output_dir, file_format)
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(tasks))
+
+    if processes > 1:
+        with SharedChain(labels, data) as chain:
+            # Share the CPUs between the processes, rather than each KDE
+            # starting a thread per CPU
+            threads = max(1, multiprocessing.cpu_count() // processes)
+            pool = multiprocessing.Pool(processes, initializer=_attach,
+                                        initargs=(chain.handle, None, threads))
+            try:
+                results = pool.map(_make_plots, tasks, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+
+        for _, statistics in results:
+            memory.add_statistics(statistics)
+    else:
+        _attach(data=data)
+        try:
+            results = map(_make_plots, tasks)
+        finally:
+            _attach(data=None)
+
+    return list(itertools.chain.from_iterable(group for group, _ in results))
+
+
+def main():
+    """
+    Parse plot options from command line arguments.
+    """
+
+    # Make parser for command line arguments
+
+    parser = arg_parser(description='Superplot many plots from command line', conflict_handler='resolve')
+
+    parser.add_argument('txt_file',
+                        help='*.txt file(s) or glob pattern, concatenated into one chain',
+                        nargs='+',
+                        type=str)
+
+    parser.add_argument('--plots',
+                        help='Comma-separated indices of each plot, e.g. 2 3 2,3',
+                        nargs='+',
+                        type=_parse_plot,
+                        default=None,
+                        required=False)
+
+    parser.add_argument('--corner',
+                        help='One- and two-dimensional plots of every variable, or of every variable in --indices',
+                        action='store_true')
+
+    parser.add_argument('--indices',
+                        help='Indices of variables in corner plots',
+                        nargs='+',
+                        type=int,
+                        default=None,
+                        required=False)
+
+    parser.add_argument('--one_dim',
+                        help='Types of one-dimensional plot',
+                        nargs='+',
+                        choices=PLOT_CLASS.keys(),
+                        type=str,
+                        default=[ONE_DIM_PLOT],
+                        required=False)
+
+    parser.add_argument('--two_dim',
+                        help='Types of two-dimensional plot',
+                        nargs='+',
+                        choices=PLOT_CLASS.keys(),
+                        type=str,
+                        default=[TWO_DIM_PLOT],
+                        required=False)
+
+    parser.add_argument('--info_file',
+                        help='*.info file labelling *.txt file',
+                        type=str,
+                        default=None,
+                        required=False)
+
+    parser.add_argument('--output_dir',
+                        help='Directory for output files',
+                        type=str,
+                        default='.',
+                        required=False)
+
+    parser.add_argument('--format',
+                        help='Format of output files',
+                        type=str,
+                        default='pdf',
+                        required=False)
+
+    parser.add_argument('--processes',
+                        help='Number of processes, by default the number of CPUs',
+                        type=int,
+                        default=None,
+                        required=False)
+
+    parser.add_argument('--verbose',
+                        help='Report hit rates and timings of the cache of statistics',
+                        action='store_true')
+
+    # Add everything else
+
+    for attr in ATTRIBUTES:
+
+        # Fetch default value
+        try:
+            default_ = default(attr)
+        except KeyError:
+            # Make sure plot elements are shown if unspecified
+            if 'show' in attr:
+                default_ = True
+            else:
+                default_ = None
+
+        # Add to command line
+        parser.add_argument('--{}'.format(attr),
+                            default=default_,
+                            type=guess_type,
+                            help='Superplot plot_option named tuple option')
+
+    # Fetch arguments
+    args = vars(parser.parse_args())
+
+    # Make checks
+    assert args['plots'] or args['corner'], 'Must specify --plots or --corner'
+    assert args['indices'] is None or min(args['indices']) >= 2, 'If specified, indices >= 2'
+
+    plots = list(args['plots'] or [])
+    if args['corner']:
+        if args['indices'] is None:
+            assert not plots, 'Corner plots of every variable cannot be combined with --plots'
+            plots = None
+        else:
+            plots += corner_plots(args['indices'])
+
+    # Make plot options
+
+    plot_args = dict.fromkeys(PER_PLOT)
+    for attr in ATTRIBUTES:
+        plot_args[attr] = args[attr]
+
+    options = plot_options(**plot_args)  # Convert dictionary to named tuple
+
+    txt_file = args['txt_file']
+    if len(txt_file) == 1:
+        txt_file = txt_file[0]
+
+    # Make relevant plots
+
+    start = timer()
+    results = save_plots(txt_file, args['info_file'], plots, options,
+                         one_dim=args['one_dim'],
+                         two_dim=args['two_dim'],
+                         output_dir=args['output_dir'],
+                         file_format=args['format'],
+                         processes=args['processes'])
+
+    for output_file, summary in results:
+        print 'Output file = {}'.format(output_file)
+        print 'Summary = {}'.format(summary)
+
+    print '{} plots in {:.1f}s'.format(len(results), timer() - start)
+
+    if args['verbose']:
+        print memory.report()
+
+
+if __name__ == '__main__':
+    main()
@@ -32,6 +32,7 @@ import numpy as np
 from superplot.plot_options import plot_options, default
 import superplot.plotlib.plots as plots
 import superplot.data_loader as data_loader
+from superplot.statslib.cache import memory
 
 
 ONE_DIM_PLOT = 'One-dimensional plot.'
@@ -72,7 +73,8 @@ def __main__():
     parser = arg_parser(description='Superplot from command line', conflict_handler='resolve')
 
     parser.add_argument('txt_file',
-                        help='*.txt file',
+                        help='*.txt file(s) or glob pattern, concatenated into one chain',
+                        nargs='+',
                         type=str)
 
     parser.add_argument('--plot_description',
@@ -105,6 +107,10 @@ def __main__():
                         type=str,
                         default=None,
                         required=False)
+
+    parser.add_argument('--verbose',
+                        help='Report hit rates and timings of the cache of statistics',
+                        action='store_true')
                         
     # Add everything else
 
@@ -160,6 +166,8 @@ def __main__():
     # Fetch options not inside named tuple
 
     txt_file = args['txt_file']
+    if len(txt_file) == 1:
+        txt_file = txt_file[0]
     info_file = args['info_file']
     plot_description = args['plot_description']
     output_file = args['output_file']
@@ -168,15 +176,17 @@ def __main__():
 
     # Make relevant plot
 
-    save_plot(txt_file, info_file, output_file, plot_description, options, line_file, line_label)
+    save_plot(txt_file, info_file, output_file, plot_description, options, line_file, line_label,
+              verbose=args['verbose'])
 
 
-def save_plot(txt_file, info_file, output_file, plot_description, options, line_file, line_label):
+def save_plot(txt_file, info_file, output_file, plot_description, options, line_file, line_label,
+              verbose=False):
     """
     Make plot from arguments.
 
-    :param txt_file: Name of *.txt file
-    :type txt_file: str
+    :param txt_file: Name of *.txt file, list of names or glob pattern
+    :type txt_file: str or list
     :param info_file: Name of *.info file
     :type info_file: str
     :param output_file: Desired name of output file
@@ -189,16 +199,20 @@ def save_plot(txt_file, info_file, output_file, plot_description, options, line_
     :type line_file: str
     :param line_label: Label in legend of line
     :type line_label: str
+    :param verbose: Whether to print a report of the cache of statistics
+    :type verbose: bool
     """
     assert plot_description in PLOT_CLASS.keys()
 
-    # Fetch data
+    # Fetch data. Load only the columns that are plotted, memory-mapped if
+    # the chain was previously cached.
 
-    labels, data = data_loader.load(info_file, txt_file)
+    columns = [0, 1, options.xindex, options.yindex, options.zindex]
+    labels, data = data_loader.load(info_file, txt_file, mmap=True, columns=columns)
 
     # Make file name for plot
     if output_file is None:
-        name = basename(txt_file)
+        name = basename(data_loader.data_file_names(txt_file)[0])
         prefix = splitext(name)[0]
         all_indexes = [options.xindex, options.yindex, options.zindex]
         indexes = [str(i) for i in all_indexes if i is not None]
@@ -239,6 +253,9 @@ def save_plot(txt_file, info_file, output_file, plot_description, options, line_
     print 'Output file = {}'.format(output_file)
     print 'Summary = {}'.format(figure.summary)
 
+    if verbose:
+        print memory.report()
+
 
 if __name__ == '__main__':
     __main__()
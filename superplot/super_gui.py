@@ -40,6 +40,7 @@ except ImportError as e:
 # Superplot modules
 import data_loader
 import superplot.plotlib.plots as plots
+from superplot.plotlib.context import AnalysisContext
 from plot_options import plot_options, default
 
 pygtk.require('2.0')
@@ -219,6 +220,9 @@ class GUIControl(object):
         # Load data from files
         self.labels, self.data = data_loader.load(info_file, data_file)
 
+        # Statistics shared by all plots of the data
+        self.context = AnalysisContext(self.data)
+
         # We need at least three columns - posterior, chisq & a data column
         data_columns = self.data.shape[0]
         assert data_columns >= 3
@@ -636,6 +640,12 @@ class GUIControl(object):
         :type button:
         """
 
+        # config.yml in the user's home directory may predate KDE grid size
+        try:
+            kde_gridsize = default("kde_gridsize")
+        except KeyError:
+            kde_gridsize = None
+
         # Gather up all of the plot options and put them in
         # a plot_options tuple
         args = {"xindex": self.xindex,
@@ -674,7 +684,8 @@ class GUIControl(object):
                 "show_prof_like": self.show_prof_like.get_active(),
                 
                 "kde_pdf": self.kde_pdf.get_active(),
-                "bw_method": default("bw_method")
+                "bw_method": default("bw_method"),
+                "kde_gridsize": kde_gridsize
                 }
         self.options = plot_options(**args)
 
@@ -682,12 +693,12 @@ class GUIControl(object):
         plot_class = self.plots[self.typebox.get_active_text()]
 
         # Instantiate the plot and get the figure
-        self.fig = plot_class(self.data, self.options).figure()
+        self.fig = plot_class(self.data, self.options, context=self.context).figure()
 
         # Also store a handle to the plot class instance.
         # This is used for pickling - which needs to
         # re-create the figure to work correctly.
-        self.plot = plot_class(self.data, self.options)
+        self.plot = plot_class(self.data, self.options, context=self.context)
 
         # Put figure in plot box
         canvas = FigureCanvas(self.fig.figure)  # A gtk.DrawingArea
@@ -14,7 +14,7 @@ from argparse import ArgumentParser as arg_parser
 
 import data_loader
 from superplot.statslib.point import posterior_mean
-from superplot.statslib.one_dim import kde_posterior_pdf, posterior_median, credible_region
+from superplot.statslib.one_dim import kde_posterior_pdf, credible_regions
 
 
 ALPHA = 0.32
@@ -34,13 +34,14 @@ def custom_violin_stats(parameter, posterior, bin_limits=None):
     """
 
     pdf = kde_posterior_pdf(parameter, posterior, bin_limits=bin_limits)
+    regions = credible_regions(pdf.pdf, pdf.bin_centers, ALPHA)
 
     violin_stats = {"coords": pdf.bin_centers,
                     "vals": pdf.pdf,
                     "mean": posterior_mean(posterior, parameter),
-                    "median": posterior_median(pdf.pdf, pdf.bin_centers),
-                    "min": credible_region(pdf.pdf, pdf.bin_centers, ALPHA, "lower"),
-                    "max": credible_region(pdf.pdf, pdf.bin_centers, ALPHA, "upper")}
+                    "median": regions.median,
+                    "min": regions.lower[0],
+                    "max": regions.upper[0]}
 
     return violin_stats
 